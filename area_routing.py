@@ -0,0 +1,376 @@
+import heapq
+from collections import Counter, deque
+
+from change_journal import ROUTING_ATTRS
+
+INF = float('inf')
+# Area of routers without the partition attribute, as in OSPF
+BACKBONE = 0
+
+
+def _area_tree(adj, areas, area, start):
+    """(distances, previous) from start over active links that stay inside area"""
+    distances = {start: 0}
+    previous = {}
+    visited = set()
+    pq = [(0, start)]
+    while pq:
+        dist, current = heapq.heappop(pq)
+        if current in visited:
+            continue
+        visited.add(current)
+        for neighbor, data in adj[current].items():
+            if neighbor in visited or areas.get(neighbor) != area or data['status'] == 'failed':
+                continue
+            distance = dist + data['latency']
+            if distance < distances.get(neighbor, INF):
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                heapq.heappush(pq, (distance, neighbor))
+    return distances, previous
+
+
+def _walk(previous, start, end):
+    """Path start → end along a previous map rooted at start"""
+    path = [end]
+    while path[-1] != start:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return path
+
+
+def _grow(adj, members, area_size):
+    """Cut members into connected pieces of at most area_size, grown breadth-first
+
+    Pieces are started in the order of a breadth-first sweep so each starts
+    next to the previous ones; leftover crumbs smaller than a quarter area
+    then join the piece they share most links with.
+    """
+    piece = {}
+    pieces = []
+    for root in members:
+        if root in piece:
+            continue
+        sweep = deque([root])
+        seen = {root}
+        while sweep:
+            start = sweep.popleft()
+            for neighbor in adj[start]:
+                if neighbor in members and neighbor not in seen:
+                    seen.add(neighbor)
+                    sweep.append(neighbor)
+            if start in piece:
+                continue
+            current = {start}
+            piece[start] = len(pieces)
+            grow = deque([start])
+            while grow and len(current) < area_size:
+                for neighbor in adj[grow.popleft()]:
+                    if neighbor in members and neighbor not in piece and len(current) < area_size:
+                        piece[neighbor] = len(pieces)
+                        current.add(neighbor)
+                        grow.append(neighbor)
+            pieces.append(current)
+
+    for i, current in enumerate(pieces):
+        if not current or len(current) >= area_size // 4:
+            continue
+        links = Counter(piece[n] for node in current for n in adj[node] if n in piece and piece[n] != i)
+        if links:
+            target = links.most_common(1)[0][0]
+            for node in current:
+                piece[node] = target
+            pieces[target] |= current
+            pieces[i] = set()
+    return [current for current in pieces if current]
+
+
+def partition(graph, area_size):
+    """Split routers into areas of about area_size routers or fewer, with few border routers
+
+    Louvain communities (densely linked groups) become areas; any community
+    larger than area_size is cut into connected pieces by _grow().
+    """
+    import networkx as nx
+    area = {}
+    next_id = 0
+    for community in nx.community.louvain_communities(graph, weight=None, seed=0):
+        pieces = [community] if len(community) <= area_size else _grow(graph._adj, community, area_size)
+        for members in pieces:
+            for node in members:
+                area[node] = next_id
+            next_id += 1
+    return area
+
+
+class AreaRouting:
+    """OSPF-style hierarchical shortest paths over areas of routers
+
+    Routers are split into areas by a node attribute or by partition()
+    (Louvain communities, which takes seconds on tens of thousands of routers).
+    Every border router (one with a link into another area) keeps a
+    shortest-path tree inside its own area, and the border-to-border
+    distances from those trees plus the inter-area links form a small
+    backbone graph. A route is source → border inside the source area,
+    border → border over the backbone, then border → target inside the
+    target area, which gives the same cost as a flat Dijkstra.
+
+    Changes are read from the journal: a link change re-solves only the
+    area it lies in, and the backbone is rebuilt only if a border-to-border
+    distance or an inter-area link actually changed.
+    """
+
+    def __init__(self, simulator, attr=None, area_size=200):
+        self.simulator = simulator
+        self.attr = attr
+        self.area_size = area_size
+        self.version = None
+        self.area = {}
+        self.members = {}
+        self.borders = {}
+        self.trees = {}
+        self.summaries = {}
+        self.backbone = {}
+        self.recomputed = 0
+        self._sources = {}
+        self._backbone_routes = {}
+
+    # ---- maintenance -------------------------------------------------
+
+    def sync(self):
+        """Fold in every topology change since the last call"""
+        sim = self.simulator
+        if self.version == sim.version:
+            return
+        change = sim.journal.since(self.version)
+        if change is None or change.reset:
+            self.rebuild()
+        else:
+            self._apply(change)
+        self.version = sim.version
+
+    def rebuild(self):
+        """Repartition and re-solve every area"""
+        graph = self.simulator.graph
+        if self.attr is None:
+            self.area = partition(graph, self.area_size)
+        else:
+            self.area = {node: area for node, area in graph.nodes(data=self.attr, default=BACKBONE)}
+        self.members = {}
+        for node, area in self.area.items():
+            self.members.setdefault(area, set()).add(node)
+        self.trees = {}
+        self.summaries = {}
+        self._sources = {}
+        self._backbone_routes = {}
+        self.borders = {area: set() for area in self.members}
+        for u, v in graph.edges:
+            if self.area[u] != self.area[v]:
+                self.borders[self.area[u]].add(u)
+                self.borders[self.area[v]].add(v)
+        for area in self.members:
+            self._solve(area)
+        self._build_backbone()
+        self.version = self.simulator.version
+
+    def _assign(self, node):
+        graph = self.simulator.graph
+        if self.attr is not None:
+            return graph._node[node].get(self.attr, BACKBONE)
+        # Join the area most of its links lead into, or start a new one
+        areas = Counter(self.area[n] for n in graph._adj[node] if n in self.area)
+        if areas:
+            return areas.most_common(1)[0][0]
+        return max((a for a in self.members if isinstance(a, int)), default=-1) + 1
+
+    def _is_border(self, node):
+        area = self.area[node]
+        return any(self.area.get(n, area) != area for n in self.simulator.graph._adj[node])
+
+    def _apply(self, change):
+        graph = self.simulator.graph
+        dirty = set()
+        touched = set()
+        inter_changed = False
+
+        for node in change.nodes:
+            if node in graph._node and node not in self.area:
+                area = self.area[node] = self._assign(node)
+                self.members.setdefault(area, set()).add(node)
+                self.borders.setdefault(area, set())
+                dirty.add(area)
+            elif node not in graph._node and node in self.area:
+                area = self.area.pop(node)
+                self.members[area].discard(node)
+                self._sources.pop(node, None)
+                self._backbone_routes.pop(node, None)
+                dirty.add(area)
+                touched.add(node)
+
+        for (u, v), kind in change.edges.items():
+            if not isinstance(kind, str) and not kind & ROUTING_ATTRS:
+                continue
+            touched.update((u, v))
+            area_u, area_v = self.area.get(u), self.area.get(v)
+            if area_u == area_v:
+                if area_u is not None:
+                    dirty.add(area_u)
+            else:
+                inter_changed = True
+
+        # Links added or removed across areas may create or retire border routers
+        for node in touched:
+            if node not in self.area:
+                for borders in self.borders.values():
+                    borders.discard(node)
+                continue
+            area = self.area[node]
+            border = self._is_border(node)
+            if border and node not in self.borders[area]:
+                self.borders[area].add(node)
+                dirty.add(area)
+            elif not border and node in self.borders[area]:
+                self.borders[area].discard(node)
+                dirty.add(area)
+
+        backbone_changed = inter_changed
+        for area in dirty:
+            if not self.members.get(area):
+                self.members.pop(area, None)
+                self.borders.pop(area, None)
+                self.trees.pop(area, None)
+                backbone_changed |= bool(self.summaries.pop(area, None))
+                continue
+            old = self.summaries.get(area)
+            self._solve(area)
+            backbone_changed |= self.summaries[area] != old
+        if backbone_changed:
+            self._build_backbone()
+
+    def _solve(self, area):
+        """Intra-area trees from every border router and the border-to-border summary"""
+        adj = self.simulator.graph._adj
+        borders = self.borders[area]
+        trees = {border: _area_tree(adj, self.area, area, border) for border in borders}
+        self.trees[area] = trees
+        self.summaries[area] = {(b1, b2): trees[b1][0][b2] for b1 in borders for b2 in borders
+                                if b1 != b2 and b2 in trees[b1][0]}
+        # Cached routes from sources in this area are stale
+        self._sources = {node: tree for node, tree in self._sources.items() if self.area.get(node) != area}
+        self._backbone_routes = {node: routes for node, routes in self._backbone_routes.items()
+                                 if self.area.get(node) != area}
+        self.recomputed += 1
+
+    def _build_backbone(self):
+        """Border routers linked by intra-area summaries and active inter-area links"""
+        backbone = {}
+        for area, summary in self.summaries.items():
+            for (b1, b2), cost in summary.items():
+                backbone.setdefault(b1, {})[b2] = (cost, area)
+        adj = self.simulator.graph._adj
+        for area, borders in self.borders.items():
+            for u in borders:
+                backbone.setdefault(u, {})
+                for v, data in adj[u].items():
+                    if self.area.get(v) != area and data['status'] != 'failed':
+                        backbone[u][v] = (data['latency'], None)
+        self.backbone = backbone
+        self._backbone_routes = {}
+
+    # ---- queries -----------------------------------------------------
+
+    def _intra(self, node):
+        """(distances, previous) from node inside its own area"""
+        area = self.area[node]
+        tree = self.trees[area].get(node)
+        if tree is None:
+            tree = self._sources.get(node)
+            if tree is None:
+                tree = self._sources[node] = _area_tree(self.simulator.graph._adj, self.area, area, node)
+        return tree
+
+    def _backbone_from(self, source):
+        """Shortest distances from source to every border router via the backbone"""
+        routes = self._backbone_routes.get(source)
+        if routes is not None:
+            return routes
+        distances = self._intra(source)[0]
+        dist = {}
+        previous = {}
+        pq = []
+        for border in self.borders[self.area[source]]:
+            if border in distances:
+                dist[border] = distances[border]
+                pq.append((distances[border], border))
+        heapq.heapify(pq)
+        visited = set()
+        while pq:
+            d, current = heapq.heappop(pq)
+            if current in visited:
+                continue
+            visited.add(current)
+            for neighbor, (cost, via) in self.backbone.get(current, {}).items():
+                if neighbor in visited:
+                    continue
+                distance = d + cost
+                if distance < dist.get(neighbor, INF):
+                    dist[neighbor] = distance
+                    previous[neighbor] = (current, via)
+                    heapq.heappush(pq, (distance, neighbor))
+        routes = self._backbone_routes[source] = (dist, previous)
+        return routes
+
+    def route(self, source, target):
+        """(path, cost) from source to target; ([], inf) if unreachable"""
+        self.sync()
+        if source not in self.area or target not in self.area:
+            return [], INF
+        if source == target:
+            return [source], 0
+
+        area = self.area[target]
+        intra = self._intra(source)
+        best, exit_border = INF, None
+        if self.area[source] == area and target in intra[0]:
+            best = intra[0][target]
+        dist, previous = self._backbone_from(source)
+        trees = self.trees[area]
+        for border in self.borders[area]:
+            if border in dist:
+                cost = dist[border] + trees[border][0].get(target, INF)
+                if cost < best:
+                    best, exit_border = cost, border
+        if best == INF:
+            return [], INF
+        if exit_border is None:
+            return _walk(intra[1], source, target), best
+
+        # Unwind the backbone hops from the exit border back to the source area
+        hops = []
+        current = exit_border
+        while current in previous:
+            prior, via = previous[current]
+            hops.append((prior, current, via))
+            current = prior
+        path = _walk(intra[1], source, current)
+        for prior, node, via in reversed(hops):
+            if via is None:
+                path.append(node)
+            else:
+                path.extend(_walk(self.trees[via][prior][1], prior, node)[1:])
+        if exit_border != target:
+            path.extend(_walk(trees[exit_border][1], exit_border, target)[1:])
+        return path, best
+
+    # ---- reporting ---------------------------------------------------
+
+    def summary(self):
+        """Per-area router, border and intra-area link counts"""
+        self.sync()
+        adj = self.simulator.graph._adj
+        rows = []
+        for area, members in self.members.items():
+            links = sum(1 for u in members for v in adj[u] if self.area.get(v) == area) // 2
+            rows.append({'Area': area, 'Routers': len(members), 'Border Routers': len(self.borders[area]),
+                         'Links': links})
+        return rows
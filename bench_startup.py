@@ -0,0 +1,108 @@
+"""Cold-start import benchmark
+
+Imports each module in a fresh interpreter, reports how long the import
+took and which heavy dependencies it pulled in, and exits non-zero if a
+module loads one it is supposed to defer until a feature needs it. A
+last probe builds a NetworkSimulator and routes once, which is what a
+headless worker pays before its first answer.
+
+    python bench_startup.py [--repeat 5] [module ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY = ('networkx', 'matplotlib', 'pandas', 'PIL', 'streamlit', 'scipy')
+
+# Heavy dependencies each module must not load on import. Core routing needs
+# NumPy only, so it defers all of them; the UI layers defer drawing, tables and images
+DEFERRED = {
+    'network_core': HEAVY,
+    'topology_store': HEAVY,
+    'forwarding': HEAVY,
+    'fast_reroute': HEAVY,
+    'parallel_routing': HEAVY,
+    'traffic_equilibrium': HEAVY,
+    'multicast': HEAVY,
+    'packet_table': HEAVY,
+    'queueing': HEAVY,
+    'flow_analytics': HEAVY,
+    'link_schedule': HEAVY,
+    'topology_import': HEAVY,
+    'export_cache': HEAVY,
+    'spatial_index': HEAVY,
+    'change_journal': HEAVY,
+    'connectivity': HEAVY,
+    'area_routing': HEAVY,
+    'route_server': HEAVY,
+    'status_tables': ('pandas',),
+    'frame_buffer': ('matplotlib', 'PIL'),
+    'visualization': ('matplotlib', 'networkx'),
+    'gif_generator': ('matplotlib', 'networkx', 'PIL'),
+    'ui_components': ('pandas', 'matplotlib', 'networkx', 'PIL'),
+    'main': ('pandas', 'matplotlib', 'networkx', 'PIL'),
+}
+
+# Constructing a simulator and routing once; the topology graph is still a
+# networkx.Graph, so networkx is the one heavy dependency this may load
+FIRST_ROUTE = (
+    "from network_core import NetworkSimulator\n"
+    "sim = NetworkSimulator(seed=0)\n"
+    "sim.add_routers(['R1', 'R2'])\n"
+    "sim.add_links(['R1'], ['R2'])\n"
+    "sim.dijkstra('R1', 'R2')\n"
+)
+FIRST_ROUTE_DEFERRED = tuple(name for name in HEAVY if name != 'networkx')
+
+PROBE = (
+    "import sys, time, json\n"
+    "start = time.perf_counter()\n"
+    "{code}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps([elapsed, [m for m in {heavy!r} if m in sys.modules]]))\n"
+)
+
+
+def probe(code, cwd):
+    """(seconds, heavy modules loaded) for running code in a new interpreter"""
+    result = subprocess.run([sys.executable, '-c', PROBE.format(code=code, heavy=HEAVY)],
+                            cwd=cwd, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"{code.splitlines()[0]} failed:\n{result.stderr}")
+    elapsed, loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=list(DEFERRED))
+    parser.add_argument('--repeat', type=int, default=3, help="imports per module (median is reported)")
+    args = parser.parse_args()
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    checks = [(module, f"import {module}", DEFERRED.get(module, ())) for module in args.modules]
+    checks.append(('(first route)', FIRST_ROUTE, FIRST_ROUTE_DEFERRED))
+
+    failures = []
+    print(f"{'module':<22}{'cold ms':>10}  heavy dependencies loaded")
+    for module, code, deferred in checks:
+        runs = [probe(code, cwd) for _ in range(args.repeat)]
+        elapsed = statistics.median(run[0] for run in runs)
+        loaded = runs[-1][1]
+        leaked = [name for name in loaded if name in deferred]
+        note = ', '.join(loaded) or '-'
+        if leaked:
+            failures.append((module, leaked))
+            note += f"  <-- should defer {', '.join(leaked)}"
+        print(f"{module:<22}{elapsed * 1000:>10.1f}  {note}")
+
+    for module, leaked in failures:
+        print(f"FAIL: {module} loads {', '.join(leaked)}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
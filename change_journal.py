@@ -0,0 +1,194 @@
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+ADDED = 'added'
+REMOVED = 'removed'
+
+# Link attributes shortest paths depend on (see NetworkSimulator._shortest_path_tree)
+ROUTING_ATTRS = frozenset({'latency', 'status'})
+
+
+def edge_key(u, v):
+    """Direction-free key for a link"""
+    try:
+        return (u, v) if u <= v else (v, u)
+    except TypeError:
+        return (u, v) if str(u) <= str(v) else (v, u)
+
+
+class Change:
+    """Routers and links touched by one transaction, or by a run of them merged
+
+    nodes and edges map each touched router / link (by edge_key) to the set
+    of attribute names that changed, or to ADDED / REMOVED. reset marks a
+    wholesale swap of the graph (opening, restoring or clearing a topology)
+    where nothing finer is known.
+    """
+
+    def __init__(self, version=0):
+        self.version = version
+        self.nodes = {}
+        self.edges = {}
+        self.reset = False
+
+    def __bool__(self):
+        return self.reset or bool(self.nodes) or bool(self.edges)
+
+    @staticmethod
+    def _mark(table, keys, change):
+        # Attribute sets are frozen so one set can be shared by many keys
+        if isinstance(change, str):
+            table.update(dict.fromkeys(keys, change))
+            return
+        change = frozenset(change)
+        get = table.get
+        for key in keys:
+            current = get(key)
+            if current is None:
+                table[key] = change
+            elif not isinstance(current, str):
+                table[key] = current | change
+            # Attribute edits to something added in the same run leave it ADDED
+
+    def mark_nodes(self, nodes, change):
+        self._mark(self.nodes, nodes, change)
+
+    def mark_edges(self, pairs, change):
+        self._mark(self.edges, (edge_key(u, v) for u, v in pairs), change)
+
+    def merge(self, other):
+        self.reset = self.reset or other.reset
+        for node, change in other.nodes.items():
+            self._mark(self.nodes, (node,), change)
+        for key, change in other.edges.items():
+            self._mark(self.edges, (key,), change)
+        self.version = max(self.version, other.version)
+        return self
+
+    @property
+    def structural(self):
+        """True if routers or links were added or removed (or everything was replaced)"""
+        return self.reset or any(isinstance(c, str) for c in self.nodes.values()) or \
+            any(isinstance(c, str) for c in self.edges.values())
+
+    @staticmethod
+    def _changed(table, attrs):
+        return {key for key, change in table.items()
+                if not isinstance(change, str) and (attrs is None or change & attrs)}
+
+    def changed_links(self, attrs=None):
+        """Surviving links with any of attrs changed (any attribute if attrs is None)"""
+        return self._changed(self.edges, attrs)
+
+    def changed_routers(self, attrs=None):
+        """Surviving routers with any of attrs changed (any attribute if attrs is None)"""
+        return self._changed(self.nodes, attrs)
+
+    def affects(self, link_attrs=None, router_attrs=None):
+        """True if a view reading these link / router attributes may be stale
+
+        None stands for every attribute; pass () for a view that reads none.
+        Structural changes affect every view.
+        """
+        if self.structural:
+            return True
+        link_attrs = None if link_attrs is None else frozenset(link_attrs)
+        router_attrs = None if router_attrs is None else frozenset(router_attrs)
+        return bool((link_attrs is None or link_attrs) and self.changed_links(link_attrs)) or \
+            bool((router_attrs is None or router_attrs) and self.changed_routers(router_attrs))
+
+
+class ChangeJournal:
+    """Monotonically versioned log of topology changes with subscribers
+
+    Mutations are recorded into a pending Change; commit(), or the end of
+    the outermost batch(), stamps it with the next version, keeps it in a
+    bounded history and hands it to every subscriber. Views either
+    subscribe for pushes or ask since(version) for everything they missed.
+    """
+
+    def __init__(self, maxlen=1024):
+        self.version = 0
+        self.structure_version = 0
+        self.history = deque(maxlen=maxlen)
+        self._pending = Change()
+        self._depth = 0
+        self._subscribers = []
+
+    def record_node(self, node, change):
+        self._pending.mark_nodes((node,), change)
+
+    def record_edge(self, u, v, change):
+        self._pending.mark_edges(((u, v),), change)
+
+    def record_nodes(self, nodes, change):
+        self._pending.mark_nodes(nodes, change)
+
+    def record_edges(self, pairs, change):
+        self._pending.mark_edges(pairs, change)
+
+    def record_reset(self):
+        self._pending.reset = True
+
+    def commit(self):
+        """Close the pending change as the next version, unless inside a batch"""
+        if self._depth or not self._pending:
+            return None
+        change, self._pending = self._pending, Change()
+        self.version += 1
+        change.version = self.version
+        if change.structural:
+            self.structure_version += 1
+        self.history.append(change)
+        for ref in list(self._subscribers):
+            callback = ref()
+            if callback is None:
+                self._subscribers.remove(ref)
+            else:
+                callback(change)
+        return change
+
+    @contextmanager
+    def batch(self):
+        """Group recorded changes into one version"""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            self.commit()
+
+    def since(self, version):
+        """Every change after version merged into one, or None if history no longer reaches back"""
+        if version is None or version > self.version:
+            return None
+        missed = []
+        for change in reversed(self.history):
+            if change.version <= version:
+                break
+            missed.append(change)
+        if len(missed) < self.version - version:
+            return None
+        merged = Change(version)
+        for change in reversed(missed):
+            merged.merge(change)
+        return merged
+
+    def changed_since(self, version, link_attrs=None, router_attrs=None):
+        """False only if nothing after version touched these attributes or the structure"""
+        if version == self.version:
+            return False
+        change = self.since(version)
+        return change is None or change.affects(link_attrs, router_attrs)
+
+    def subscribe(self, callback):
+        """Call callback(change) after every commit; bound methods are held weakly"""
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        self._subscribers.append(ref)
+
+    def unsubscribe(self, callback):
+        self._subscribers = [ref for ref in self._subscribers if ref() not in (None, callback)]
@@ -0,0 +1,173 @@
+from collections import deque
+
+from change_journal import edge_key
+
+
+class ConnectivityIndex:
+    """Connected components over active links, kept up to date from the change journal
+
+    Every router carries a component id, so reachability is a dict lookup.
+    A link coming up merges two components by relabelling the smaller one;
+    a link going down runs a search from both ends at once that stops as
+    soon as they meet (still connected) or one side runs out (that side is
+    the new component), so the work is bounded by the smaller side rather
+    than the whole graph. Changes are read as a diff of the active links
+    against the journal, so any run of batched edits folds in correctly.
+    """
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.version = None
+        self.label = {}
+        self.members = {}
+        self.active = set()
+        self._next_id = 0
+
+    def sync(self):
+        """Fold in every topology change since the last call"""
+        sim = self.simulator
+        if self.version == sim.version:
+            return
+        change = sim.journal.since(self.version)
+        if change is None or change.reset:
+            self._rebuild()
+        else:
+            self._apply(change)
+        self.version = sim.version
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def _rebuild(self):
+        graph = self.simulator.graph
+        self.label = {}
+        self.members = {}
+        self.active = {edge_key(u, v) for u, v, status in graph.edges(data='status') if status != 'failed'}
+        for node in graph.nodes:
+            if node not in self.label:
+                component = self._search(node, {})
+                component_id = self._new_id()
+                self.members[component_id] = component
+                for member in component:
+                    self.label[member] = component_id
+
+    def _search(self, start, pending):
+        """Every router reachable from start over active links (and pending ones)"""
+        seen = {start}
+        stack = [start]
+        while stack:
+            for neighbor in self._neighbors(stack.pop(), pending):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        return seen
+
+    def _neighbors(self, node, pending):
+        adj = self.simulator.graph._adj.get(node, {})
+        for neighbor, data in adj.items():
+            if data['status'] != 'failed':
+                yield neighbor
+        yield from pending.get(node, ())
+
+    def _apply(self, change):
+        graph = self.simulator.graph
+        adj = graph._adj
+        for node in change.nodes:
+            if node in graph._node and node not in self.label:
+                component_id = self._new_id()
+                self.label[node] = component_id
+                self.members[component_id] = {node}
+
+        up, down = [], []
+        for key in change.edges:
+            u, v = key
+            data = adj.get(u, {}).get(v)
+            now = data is not None and data['status'] != 'failed'
+            if now and key not in self.active:
+                up.append(key)
+            elif not now and key in self.active:
+                down.append(key)
+
+        for u, v in up:
+            self.active.add((u, v))
+            self._union(u, v)
+
+        # Take links down one at a time; the ones not yet handled still count as up
+        pending = {}
+        for u, v in down:
+            pending.setdefault(u, []).append(v)
+            pending.setdefault(v, []).append(u)
+        for u, v in down:
+            self.active.discard((u, v))
+            pending[u].remove(v)
+            pending[v].remove(u)
+            self._split(u, v, pending)
+
+        for node in change.nodes:
+            if node not in graph._node and node in self.label:
+                component_id = self.label.pop(node)
+                self.members[component_id].discard(node)
+                if not self.members[component_id]:
+                    del self.members[component_id]
+
+    def _union(self, u, v):
+        a, b = self.label[u], self.label[v]
+        if a == b:
+            return
+        if len(self.members[a]) < len(self.members[b]):
+            a, b = b, a
+        for node in self.members[b]:
+            self.label[node] = a
+        self.members[a] |= self.members.pop(b)
+
+    def _split(self, u, v, pending):
+        if self.label.get(u) != self.label.get(v):
+            return
+        # Breadth-first from both ends, one router at a time; the first to run out is cut off
+        sides = [({u}, deque([u])), ({v}, deque([v]))]
+        while True:
+            for this, other in ((0, 1), (1, 0)):
+                seen, queue = sides[this]
+                if not queue:
+                    self._detach(seen)
+                    return
+                for neighbor in self._neighbors(queue.popleft(), pending):
+                    if neighbor in sides[other][0]:
+                        return
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+
+    def _detach(self, nodes):
+        old = self.label[next(iter(nodes))]
+        self.members[old] -= nodes
+        component_id = self._new_id()
+        self.members[component_id] = nodes
+        for node in nodes:
+            self.label[node] = component_id
+
+    def connected(self, u, v):
+        """True if v is reachable from u over active links"""
+        self.sync()
+        label = self.label.get(u)
+        return label is not None and label == self.label.get(v)
+
+    def component_id(self, node):
+        self.sync()
+        return self.label.get(node)
+
+    def component(self, node):
+        """Routers in node's component (including node)"""
+        self.sync()
+        return frozenset(self.members.get(self.label.get(node), ()))
+
+    @property
+    def count(self):
+        self.sync()
+        return len(self.members)
+
+    def components(self):
+        """Member sets, largest component first"""
+        self.sync()
+        return sorted((frozenset(nodes) for nodes in self.members.values()), key=len, reverse=True)
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import tempfile
+import threading
+import weakref
+
+# Link attributes that show up in a rendered frame
+FRAME_ATTRS = ('status', 'latency', 'congestion')
+
+
+def topology_fingerprint(graph, pos):
+    """Digest of everything about a topology that shows up in a rendered frame"""
+    digest = hashlib.sha256()
+    for node in graph.nodes:
+        x, y = pos[node]
+        digest.update(repr((node, round(float(x), 6), round(float(y), 6))).encode())
+    for u, v, data in graph.edges(data=True):
+        digest.update(repr((u, v) + tuple(data[attr] for attr in FRAME_ATTRS)).encode())
+    return digest.hexdigest()
+
+
+class ExportCache:
+    """Content-addressed on-disk cache of rendered exports, bounded LRU
+
+    Entries are named by the hash of whatever determines their content,
+    so identical exports from any session share one file and nothing is
+    ever overwritten in place. Files are written under a temporary name
+    and renamed into place; hits refresh the file's mtime, and the least
+    recently used entries are deleted once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory='exports', max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._fingerprints = weakref.WeakKeyDictionary()
+        os.makedirs(directory, exist_ok=True)
+
+    def fingerprint(self, simulator):
+        """Topology digest, recomputed once per topology version"""
+        cached = self._fingerprints.get(simulator)
+        journal = simulator.journal
+        if cached is None or journal.changed_since(cached[0], FRAME_ATTRS, ()):
+            cached = (journal.version, topology_fingerprint(simulator.graph, simulator.layout()))
+        else:
+            cached = (journal.version, cached[1])
+        self._fingerprints[simulator] = cached
+        return cached[1]
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key, suffix):
+        """Path of a cached export, or None"""
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_or_create(self, key, suffix, render):
+        """Cached export for key, calling render(tmp_path) to produce it on a miss
+
+        render returns the path it wrote, or None if it could not export.
+        """
+        path = self.get(key, suffix)
+        if path is not None:
+            return path
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix, dir=self.directory, prefix='.tmp-')
+        os.close(fd)
+        try:
+            if not render(tmp_path) or not os.path.getsize(tmp_path):
+                return None
+            path = self.path(key, suffix)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict(keep=path)
+        return path
+
+    def entries(self):
+        """(mtime, size, path) for every finished export"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.tmp-'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self, keep=None):
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self.entries():
+                os.remove(path)
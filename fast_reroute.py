@@ -0,0 +1,183 @@
+import numpy as np
+
+from forwarding import first_hops
+from change_journal import ROUTING_ATTRS
+
+INF = float('inf')
+PRIMARY = 'primary'
+LFA = 'lfa'
+REMOTE_LFA = 'remote-lfa'
+# PQ nodes tried per protected link
+PQ_CANDIDATES = 16
+
+
+class FastReroute:
+    """Link-protecting loop-free alternates (RFC 5286) and remote LFAs (RFC 7490)
+
+    compute() takes one shortest-path tree per router (the simulator's
+    cached ones where present) and derives every router's primary, LFA
+    and remote-LFA next hops from the resulting distance matrix, so no
+    extra Dijkstra runs per neighbor. Remote LFAs are searched per
+    protected link among its cheapest PQ nodes, not over every router for
+    every destination. The tables describe the topology at the version
+    they were computed for; repair_path() replays a link failure against
+    them by lookup alone, as routers would before reconverging.
+    """
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.version = None
+        self.nodes = []
+        self.index = {}
+        self.distances = np.empty((0, 0))
+        self.primary = np.empty((0, 0), dtype=np.int32)
+        self.lfa = np.empty((0, 0), dtype=np.int32)
+        self.rlfa_hop = np.empty((0, 0), dtype=np.int32)
+        self.rlfa_node = np.empty((0, 0), dtype=np.int32)
+
+    @property
+    def stale(self):
+        journal = self.simulator.journal
+        if journal.changed_since(self.version, ROUTING_ATTRS, ()):
+            return True
+        # Only costs the tables ignore changed; they describe this version too
+        self.version = journal.version
+        return False
+
+    def compute(self):
+        """Rebuild every router's tables from the current topology"""
+        sim = self.simulator
+        self.nodes = list(sim.graph.nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        n = len(self.nodes)
+        index = self.index
+
+        dist = np.full((n, n), INF)
+        primary = np.full((n, n), -1, dtype=np.int32)
+        for i, node in enumerate(self.nodes):
+            # One tree per router would flush the shared route cache on large networks
+            distances, previous = sim.shortest_paths(node, store=False)
+            dist[i, [index[d] for d in distances]] = list(distances.values())
+            hops = first_hops(node, distances, previous)
+            primary[i, [index[d] for d in hops]] = [index[h] for h in hops.values()]
+
+        self.distances = dist
+        self.primary = primary
+        self.lfa = np.full((n, n), -1, dtype=np.int32)
+        self.rlfa_hop = np.full((n, n), -1, dtype=np.int32)
+        self.rlfa_node = np.full((n, n), -1, dtype=np.int32)
+        for s in range(n):
+            self._protect(s)
+        self.version = sim.version
+
+    def _neighbors(self, s):
+        adj = self.simulator.graph.adj[self.nodes[s]]
+        links = [(self.index[v], data['latency']) for v, data in adj.items() if data['status'] != 'failed']
+        neighbors = np.array([v for v, _ in links], dtype=np.int32)
+        return neighbors, np.array([w for _, w in links], dtype=float)
+
+    def _protect(self, s):
+        dist = self.distances
+        neighbors, weights = self._neighbors(s)
+        primary = self.primary[s]
+        targets = np.flatnonzero((primary >= 0) & (np.arange(len(primary)) != s))
+        if not len(neighbors) or not len(targets):
+            return
+
+        # LFA: neighbor N whose own shortest path to D avoids S
+        to_dest = dist[np.ix_(neighbors, targets)]
+        loop_free = to_dest < dist[neighbors, s][:, None] + dist[s, targets][None, :]
+        loop_free &= neighbors[:, None] != primary[targets][None, :]
+        cost = np.where(loop_free, weights[:, None] + to_dest, INF)
+        best = cost.argmin(axis=0)
+        found = np.isfinite(cost[best, np.arange(len(targets))])
+        self.lfa[s, targets[found]] = neighbors[best[found]]
+
+        # Remote LFA for the rest, one protected link at a time
+        uncovered = targets[~found]
+        if not len(uncovered):
+            return
+        # Extended P-space: what each neighbor reaches without crossing S, and at what cost
+        reach = np.where(dist[neighbors] < dist[neighbors, s][:, None] + dist[s][None, :],
+                         weights[:, None] + dist[neighbors], INF)
+        reach[:, s] = INF
+        for e in np.unique(primary[uncovered]):
+            dests = uncovered[primary[uncovered] == e]
+            others = np.flatnonzero(neighbors != e)
+            if not len(others):
+                continue
+            best = reach[others].argmin(axis=0)
+            tunnel = reach[others[best], np.arange(len(best))]
+            tunnel_hop = neighbors[others[best]]
+
+            # PQ nodes: in P-space and in the link's Q-space, reaching E without S (RFC 7490)
+            pq = np.flatnonzero(np.isfinite(tunnel) & (dist[:, e] < dist[:, s] + dist[s, e]))
+            if not len(pq):
+                continue
+            # The cheapest few to reach E by are enough; sparse networks can have hundreds
+            if len(pq) > PQ_CANDIDATES:
+                pq = pq[np.argpartition(tunnel[pq] + dist[pq, e], PQ_CANDIDATES)[:PQ_CANDIDATES]]
+            # Usable for a destination only if the PQ node's own path there avoids S too
+            to_dest = dist[np.ix_(pq, dests)]
+            q_space = to_dest < dist[pq, s][:, None] + dist[s, dests][None, :]
+            total = np.where(q_space, tunnel[pq][:, None] + to_dest, INF)
+            pick = total.argmin(axis=0)
+            ok = np.isfinite(total[pick, np.arange(len(dests))])
+            self.rlfa_node[s, dests[ok]] = pq[pick[ok]]
+            self.rlfa_hop[s, dests[ok]] = tunnel_hop[pq[pick[ok]]]
+
+    def protection(self, router, destination):
+        """('lfa' | 'remote-lfa' | None, repair next hop, PQ node) for one pair"""
+        s, d = self.index[router], self.index[destination]
+        if self.lfa[s, d] >= 0:
+            return LFA, self.nodes[self.lfa[s, d]], None
+        if self.rlfa_node[s, d] >= 0:
+            return REMOTE_LFA, self.nodes[self.rlfa_hop[s, d]], self.nodes[self.rlfa_node[s, d]]
+        return None, None, None
+
+    def coverage(self):
+        """Fraction of reachable (router, destination) pairs with a repair"""
+        reachable = self.primary >= 0
+        np.fill_diagonal(reachable, False)
+        total = int(reachable.sum())
+        if not total:
+            return 1.0
+        protected = reachable & ((self.lfa >= 0) | (self.rlfa_node >= 0))
+        return int(protected.sum()) / total
+
+    def unprotected(self):
+        """(router, destination, primary next hop) for every pair without a repair"""
+        missing = (self.primary >= 0) & (self.lfa < 0) & (self.rlfa_node < 0)
+        np.fill_diagonal(missing, False)
+        return [(self.nodes[s], self.nodes[d], self.nodes[self.primary[s, d]])
+                for s, d in zip(*np.nonzero(missing))]
+
+    def repair_path(self, start, end, failed_link):
+        """Path and kind of forwarding from start to end once failed_link is down
+
+        Uses only the precomputed tables: routers forward on their primary
+        next hop until one would cross the failed link, which then switches
+        to its LFA, or tunnels to its PQ node for a remote LFA.
+        """
+        failed = {self.index[failed_link[0]], self.index[failed_link[1]]}
+        router, target, d = self.index[start], self.index[end], self.index[end]
+        path, kind = [router], PRIMARY
+        for _ in range(2 * len(self.nodes)):
+            if router == d:
+                return [self.nodes[i] for i in path], kind
+            if router == target:
+                target = d
+            hop = self.primary[router, target]
+            if hop < 0:
+                break
+            if {router, hop} == failed:
+                if self.lfa[router, d] >= 0:
+                    hop, kind = self.lfa[router, d], LFA
+                elif self.rlfa_node[router, d] >= 0:
+                    hop, kind = self.rlfa_hop[router, d], REMOTE_LFA
+                    target = self.rlfa_node[router, d]
+                else:
+                    break
+            path.append(hop)
+            router = hop
+        return [self.nodes[i] for i in path], None
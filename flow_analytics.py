@@ -0,0 +1,204 @@
+import math
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+DIMENSIONS = ('flow', 'source', 'destination', 'link')
+
+
+class QuantileSketch:
+    """DDSketch-style streaming quantiles with bounded relative error
+
+    Values fall into logarithmic buckets, so every quantile is within
+    relative_accuracy of the true value. Memory is capped at max_bins
+    buckets (the lowest ones are collapsed first, keeping the tail
+    accurate), and two sketches with the same accuracy merge exactly.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, count=1):
+        if count <= 0:
+            return
+        value = float(value)
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+        self._summarize(value, value, value * count, count)
+
+    def add_many(self, values):
+        """Add an array of values with one bucket update per distinct bucket"""
+        values = np.asarray(values, dtype=float).ravel()
+        if not values.size:
+            return
+        positive = values[values > 0]
+        self.zero_count += int(values.size - positive.size)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+        self._summarize(values.min(), values.max(), values.sum(), values.size)
+
+    def _summarize(self, low, high, total, count):
+        self.count += int(count)
+        self.total += float(total)
+        self.min = min(self.min, float(low))
+        self.max = max(self.max, float(high))
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.bins)
+        excess = keys[:len(keys) - self.max_bins + 1]
+        self.bins[excess[-1]] = sum(self.bins.pop(key) for key in excess[:-1]) + self.bins[excess[-1]]
+
+    def merge(self, other):
+        """Fold another sketch (same relative accuracy) into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        if other.count:
+            self._summarize(other.min, other.max, other.total, other.count)
+        return self
+
+    def copy(self):
+        clone = QuantileSketch(self.relative_accuracy, self.max_bins)
+        return clone.merge(self)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Approximate q-quantile, or nan for an empty sketch"""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def histogram(self):
+        """(values, counts) of the non-empty buckets, for plotting"""
+        keys = sorted(self.bins)
+        values = [0.0] * bool(self.zero_count) + [self._value(key) for key in keys]
+        counts = [self.zero_count] * bool(self.zero_count) + [self.bins[key] for key in keys]
+        return values, counts
+
+
+def link_key(u, v):
+    """Direction-free key for a link"""
+    return (u, v) if str(u) <= str(v) else (v, u)
+
+
+class FlowStats:
+    """Latency and hop sketches plus loss counters for one key"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.latency = QuantileSketch(relative_accuracy)
+        self.hops = QuantileSketch(relative_accuracy)
+        self.sent = 0
+        self.lost = 0
+
+    def merge(self, other):
+        self.latency.merge(other.latency)
+        self.hops.merge(other.hops)
+        self.sent += other.sent
+        self.lost += other.lost
+        return self
+
+    def copy(self):
+        return FlowStats(self.latency.relative_accuracy).merge(self)
+
+    @property
+    def loss(self):
+        return self.lost / self.sent if self.sent else 0.0
+
+
+class FlowAnalytics:
+    """Running latency, hop and loss distributions per flow, source, destination and link
+
+    Memory is bounded by the number of keys (routers and links) times the
+    sketch size, however many packets are recorded. Stores from separate
+    runs merge into the same totals as one combined run.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.stats = {dimension: {} for dimension in DIMENSIONS}
+
+    def _stats(self, dimension, key):
+        table = self.stats[dimension]
+        if key not in table:
+            table[key] = FlowStats(self.relative_accuracy)
+        return table[key]
+
+    def record_flow(self, source, destination, latency, hops, sent=1, delivered=None):
+        """Record a burst from source to destination; latency is per delivered packet"""
+        delivered = sent if delivered is None else delivered
+        for dimension, key in (('flow', (source, destination)), ('source', source), ('destination', destination)):
+            stats = self._stats(dimension, key)
+            stats.latency.add(latency, delivered)
+            stats.hops.add(hops, delivered)
+            stats.sent += sent
+            stats.lost += sent - delivered
+
+    def record_link(self, u, v, delay, packets=1):
+        """Record packets carried by a link; drops are charged to their flows"""
+        stats = self._stats('link', link_key(u, v))
+        stats.latency.add(delay, packets)
+        stats.sent += packets
+
+    def record(self, path, latency, link_delays=None, sent=1, delivered=None):
+        """Record a burst sent along path, with each hop's delay if given"""
+        delivered = sent if delivered is None else delivered
+        self.record_flow(path[0], path[-1], latency, len(path) - 1, sent, delivered)
+        for (u, v), delay in zip(zip(path, path[1:]), link_delays or ()):
+            self.record_link(u, v, delay, delivered)
+
+    def merge(self, other):
+        for dimension, table in other.stats.items():
+            for key, stats in table.items():
+                if key in self.stats[dimension]:
+                    self.stats[dimension][key].merge(stats)
+                else:
+                    self.stats[dimension][key] = stats.copy()
+        return self
+
+    def copy(self):
+        return FlowAnalytics(self.relative_accuracy).merge(self)
+
+    def clear(self):
+        self.stats = {dimension: {} for dimension in DIMENSIONS}
+
+    def summary(self, dimension):
+        """One row per key: count, mean, p50/p95/p99, max latency and loss"""
+        rows = []
+        for key, stats in self.stats[dimension].items():
+            sketch = stats.latency
+            row = {'key': key, 'packets': sketch.count, 'mean': sketch.mean}
+            row.update({f"p{round(q * 100)}": sketch.quantile(q) for q in QUANTILES})
+            row.update({'max': sketch.max if sketch.count else math.nan, 'loss': stats.loss})
+            rows.append(row)
+        return rows
@@ -0,0 +1,217 @@
+import ipaddress
+
+import numpy as np
+
+from change_journal import ROUTING_ATTRS
+
+
+def parse_addresses(addresses):
+    """IPv4 addresses (strings or ints) as a uint32 array"""
+    if isinstance(addresses, np.ndarray) and addresses.dtype.kind in 'ui':
+        return addresses.astype(np.uint32, copy=False)
+    return np.array([int(ipaddress.IPv4Address(a)) for a in addresses], dtype=np.uint32)
+
+
+def _mask(length):
+    return (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF if length else 0
+
+
+def first_hops(source, distances, previous):
+    """First router after source on the shortest path to each destination"""
+    first_hop = {source: source}
+    # Settled in distance order, so every parent is resolved before its children
+    for node in sorted(distances, key=distances.get):
+        if node != source:
+            parent = previous[node]
+            first_hop[node] = node if parent == source else first_hop[parent]
+    return first_hop
+
+
+class _TrieNode:
+    __slots__ = ('key', 'length', 'value', 'children')
+
+    def __init__(self, key, length, value=None):
+        self.key = key
+        self.length = length
+        self.value = value
+        self.children = [None, None]
+
+
+class PrefixTrie:
+    """Path-compressed binary (Patricia) trie over IPv4 prefixes
+
+    Single lookups walk the linked nodes; lookup_batch walks a flattened
+    array copy of the trie for every address at once with NumPy.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode(0, 0)
+        self.size = 0
+        self._compiled = None
+
+    def insert(self, prefix, value):
+        """Insert an 'a.b.c.d/len' prefix (or IPv4Network)"""
+        network = ipaddress.IPv4Network(prefix, strict=False)
+        key, length = int(network.network_address), network.prefixlen
+        self._compiled = None
+
+        node = self.root
+        while True:
+            if node.length == length:
+                if node.value is None:
+                    self.size += 1
+                node.value = value
+                return
+            bit = (key >> (31 - node.length)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _TrieNode(key, length, value)
+                self.size += 1
+                return
+
+            # Length of the prefix shared by the new key and the child's key
+            common = min(length, child.length)
+            diff = (key ^ child.key) & _mask(common)
+            if diff:
+                common = 32 - diff.bit_length()
+            if common == child.length:
+                node = child
+                continue
+
+            split = _TrieNode(key & _mask(common), common)
+            split.children[(child.key >> (31 - common)) & 1] = child
+            node.children[bit] = split
+            if common == length:
+                split.value = value
+            else:
+                split.children[(key >> (31 - common)) & 1] = _TrieNode(key, length, value)
+            self.size += 1
+            return
+
+    def lookup(self, address):
+        """Value of the longest prefix matching one address, or None"""
+        address = int(ipaddress.IPv4Address(address))
+        node, best = self.root, None
+        while node is not None and (address & _mask(node.length)) == node.key:
+            if node.value is not None:
+                best = node.value
+            if node.length == 32:
+                break
+            node = node.children[(address >> (31 - node.length)) & 1]
+        return best
+
+    def items(self):
+        """(prefix, value) pairs in trie order"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.value is not None:
+                yield f"{ipaddress.IPv4Address(node.key)}/{node.length}", node.value
+            stack.extend(child for child in reversed(node.children) if child is not None)
+
+    def _compile(self):
+        """Flatten the trie into parallel arrays for vectorized lookups"""
+        nodes, values, value_ids = [], [], {}
+        queue = [self.root]
+        while queue:
+            node = queue.pop(0)
+            nodes.append(node)
+            queue.extend(child for child in node.children if child is not None)
+        ids = {id(node): i for i, node in enumerate(nodes)}
+
+        count = len(nodes)
+        keys = np.empty(count, dtype=np.uint32)
+        masks = np.empty(count, dtype=np.uint32)
+        lengths = np.empty(count, dtype=np.int64)
+        slots = np.full(count, -1, dtype=np.int64)
+        children = np.full((2, count), -1, dtype=np.int64)
+        for i, node in enumerate(nodes):
+            keys[i], masks[i], lengths[i] = node.key, _mask(node.length), node.length
+            if node.value is not None:
+                if node.value not in value_ids:
+                    value_ids[node.value] = len(values)
+                    values.append(node.value)
+                slots[i] = value_ids[node.value]
+            for bit, child in enumerate(node.children):
+                if child is not None:
+                    children[bit, i] = ids[id(child)]
+        self._compiled = (keys, masks, lengths, slots, children, values)
+        return self._compiled
+
+    def lookup_batch(self, addresses):
+        """Longest-prefix match for many addresses; returns (value_ids, values)
+
+        value_ids[i] indexes values, or is -1 when nothing matches.
+        """
+        keys, masks, lengths, slots, children, values = self._compiled or self._compile()
+        addresses = parse_addresses(addresses)
+        best = np.full(len(addresses), -1, dtype=np.int64)
+        lanes = np.arange(len(addresses))
+        node = np.zeros(len(addresses), dtype=np.int64)
+
+        while len(lanes):
+            addr = addresses[lanes]
+            match = (addr & masks[node]) == keys[node]
+            hit = match & (slots[node] >= 0)
+            best[lanes[hit]] = slots[node[hit]]
+
+            # Descend on the bit right after each node's prefix
+            shift = np.clip(31 - lengths[node], 0, 31).astype(np.uint32)
+            bit = (addr >> shift) & 1
+            child = children[bit, node]
+            keep = match & (child >= 0) & (lengths[node] < 32)
+            lanes, node = lanes[keep], child[keep]
+        return best, values
+
+
+class ForwardingPlane:
+    """Per-router LPM forwarding tables derived from the routing results"""
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.fibs = {}
+        self._version = None
+
+    def _sync(self):
+        journal = self.simulator.journal
+        # Tables depend on routes and prefixes only; other edits keep them
+        if journal.changed_since(self._version, ROUTING_ATTRS, {'prefixes'}):
+            self.fibs = {}
+        self._version = journal.version
+
+    def fib(self, router):
+        """PrefixTrie mapping destination prefixes to next-hop routers"""
+        self._sync()
+        if router not in self.fibs:
+            self.fibs[router] = self._build_fib(router)
+        return self.fibs[router]
+
+    def _build_fib(self, router):
+        graph = self.simulator.graph
+        distances, previous = self.simulator.shortest_paths(router)
+
+        first_hop = first_hops(router, distances, previous)
+
+        trie = PrefixTrie()
+        for node, hop in first_hop.items():
+            for prefix in graph.nodes[node].get('prefixes', ()):
+                trie.insert(prefix, hop)
+        return trie
+
+    def forward(self, router, addresses):
+        """Next-hop router for each address at router (None if unroutable)"""
+        value_ids, values = self.fib(router).lookup_batch(addresses)
+        lookup = np.array(values + [None], dtype=object)
+        return lookup[value_ids]
+
+    def trace(self, source, address, max_hops=64):
+        """Hop-by-hop path an address takes from source"""
+        path = [source]
+        router = source
+        for _ in range(max_hops):
+            next_hop = self.fib(router).lookup(address)
+            if next_hop is None or next_hop == router:
+                return path, next_hop == router
+            path.append(next_hop)
+            router = next_hop
+        return path, False
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import zlib
+from collections import deque
+
+import numpy as np
+
+
+class FrameBuffer:
+    """Fixed-size in-memory ring buffer of rendered animation frames"""
+
+    def __init__(self, capacity=300, compress_level=1):
+        self.frames = deque(maxlen=capacity)
+        self.compress_level = compress_level
+
+    def __len__(self):
+        return len(self.frames)
+
+    def capture(self, fig):
+        """Store the figure's raw RGBA pixels, lightly compressed"""
+        canvas = fig.canvas
+        if not hasattr(canvas, 'buffer_rgba'):
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        rgba = np.asarray(canvas.buffer_rgba())
+        height, width = rgba.shape[:2]
+        self.frames.append((width, height, zlib.compress(rgba.tobytes(), self.compress_level)))
+
+    def clear(self):
+        self.frames.clear()
+
+    def digest(self):
+        """Content hash of the buffered frames"""
+        digest = hashlib.sha256()
+        for width, height, data in self.frames:
+            digest.update(f"{width}x{height}:{len(data)}".encode())
+            digest.update(data)
+        return digest.hexdigest()
+
+    def iter_arrays(self):
+        """Decode buffered frames back into (height, width, 4) uint8 arrays"""
+        for width, height, data in self.frames:
+            yield np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(height, width, 4)
+
+    def to_images(self):
+        """Decode buffered frames as PIL images"""
+        from PIL import Image
+        return [Image.fromarray(array, 'RGBA') for array in self.iter_arrays()]
+
+    def write_pngs(self, directory='frames', prefix='frame'):
+        """Encode buffered frames to numbered PNG files for FFmpeg"""
+        import matplotlib.image as mpimg
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        paths = []
+        for i, array in enumerate(self.iter_arrays()):
+            frame_path = os.path.join(directory, f'{prefix}_{i:04d}.png')
+            mpimg.imsave(frame_path, array)
+            paths.append(frame_path)
+        return paths
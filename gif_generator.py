@@ -1,12 +1,10 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import networkx as nx
 import numpy as np
 import os
-from PIL import Image
 import io
 import warnings
 
+from visualization import temporary_figure
+
 # Suppress font warnings
 warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
 
@@ -14,88 +12,104 @@ class GifGenerator:
     def __init__(self):
         self.frames = []
     
-    def create_packet_gif(self, simulator, duration=2.0, fps=10):
+    @staticmethod
+    def _stats_text(simulator):
+        stats_text = f"Packet ID: {simulator.packet_stats.get('packet_id', 'N/A')}\n"
+        stats_text += f"Packets: {simulator.packet_stats.get('num_packets', 1)} x {simulator.packet_stats.get('packet_size', 64)}KB\n"
+        stats_text += f"Hops: {simulator.packet_stats.get('hops', 0)} | Latency: {simulator.packet_stats.get('total_latency', 0):.1f}ms"
+        return stats_text
+    
+    def create_cached_gif(self, simulator, cache, duration=2.0, fps=10):
+        """Animated GIF from the export cache, rendering it only on a miss"""
+        if not simulator.packet_path or len(simulator.packet_path) < 2:
+            return None
+        key = cache.key('gif', cache.fingerprint(simulator), tuple(simulator.packet_path),
+                        duration, fps, self._stats_text(simulator))
+        return cache.get_or_create(key, '.gif',
+                                   lambda path: self.create_packet_gif(simulator, duration, fps, path))
+    
+    def create_packet_gif(self, simulator, duration=2.0, fps=10, filename='packet_animation.gif'):
         """Generate animated GIF for packet transfer"""
         if not simulator.packet_path or len(simulator.packet_path) < 2:
             return None
         
+        # Only GIF export needs these
+        import matplotlib.patches as patches
+        import networkx as nx
+        from PIL import Image
+        
         self.frames = []
         total_frames = int(duration * fps)
-        pos = nx.spring_layout(simulator.graph, seed=42)
+        pos = simulator.layout()
         
         for frame_num in range(total_frames):
-            fig, ax = plt.subplots(figsize=(8, 6))
-            
-            # Calculate packet position
-            progress = frame_num / (total_frames - 1) * (len(simulator.packet_path) - 1)
-            path_idx = int(progress)
-            t = progress - path_idx
-            
-            # Draw routers
-            for node in simulator.graph.nodes:
-                x, y = pos[node]
-                color = 'lightgreen' if node in simulator.packet_path else 'lightblue'
+            with temporary_figure(figsize=(8, 6)) as (fig, ax):
+                # Calculate packet position
+                progress = frame_num / (total_frames - 1) * (len(simulator.packet_path) - 1)
+                path_idx = int(progress)
+                t = progress - path_idx
+                
+                # Draw routers
+                for node in simulator.graph.nodes:
+                    x, y = pos[node]
+                    color = 'lightgreen' if node in simulator.packet_path else 'lightblue'
+                    
+                    router_body = patches.Rectangle((x-0.06, y-0.04), 0.12, 0.08, 
+                                                  facecolor=color, edgecolor='black', linewidth=1)
+                    ax.add_patch(router_body)
+                    
+                    # Antenna
+                    ax.plot([x-0.03, x+0.03], [y+0.05, y+0.05], 'k-', linewidth=1)
+                    ax.scatter(x, y, c='green', s=15)
+                
+                # Draw edges
+                for u, v in simulator.graph.edges:
+                    edge_data = simulator.graph[u][v]
+                    color = 'red' if edge_data['status'] == 'failed' else 'orange' if edge_data['congestion'] > 50 else 'gray'
+                    style = '--' if edge_data['status'] == 'failed' else '-'
+                    nx.draw_networkx_edges(simulator.graph, pos, [(u, v)], edge_color=color, style=style, ax=ax)
+                
+                # Draw packet
+                if path_idx < len(simulator.packet_path) - 1:
+                    start_pos = pos[simulator.packet_path[path_idx]]
+                    end_pos = pos[simulator.packet_path[path_idx + 1]]
+                    packet_x = start_pos[0] + t * (end_pos[0] - start_pos[0])
+                    packet_y = start_pos[1] + t * (end_pos[1] - start_pos[1])
+                    
+                    # Packet body
+                    packet_body = patches.Rectangle((packet_x-0.02, packet_y-0.015), 0.04, 0.03, 
+                                                  facecolor='red', edgecolor='darkred', linewidth=1)
+                    ax.add_patch(packet_body)
+                    
+                    # Trail effect
+                    for i in range(1, min(5, frame_num + 1)):
+                        trail_progress = max(0, progress - i * 0.3)
+                        trail_idx = int(trail_progress)
+                        if trail_idx < len(simulator.packet_path) - 1:
+                            trail_t = trail_progress - trail_idx
+                            trail_x = pos[simulator.packet_path[trail_idx]][0] + trail_t * (pos[simulator.packet_path[trail_idx + 1]][0] - pos[simulator.packet_path[trail_idx]][0])
+                            trail_y = pos[simulator.packet_path[trail_idx]][1] + trail_t * (pos[simulator.packet_path[trail_idx + 1]][1] - pos[simulator.packet_path[trail_idx]][1])
+                            ax.scatter(trail_x, trail_y, c='orange', s=10, alpha=0.7 - i*0.1)
                 
-                router_body = patches.Rectangle((x-0.06, y-0.04), 0.12, 0.08, 
-                                              facecolor=color, edgecolor='black', linewidth=1)
-                ax.add_patch(router_body)
+                # Labels
+                nx.draw_networkx_labels(simulator.graph, pos, ax=ax, font_size=8)
                 
-                # Antenna
-                ax.plot([x-0.03, x+0.03], [y+0.05, y+0.05], 'k-', linewidth=1)
-                ax.scatter(x, y, c='green', s=15)
-            
-            # Draw edges
-            for u, v in simulator.graph.edges:
-                edge_data = simulator.graph[u][v]
-                color = 'red' if edge_data['status'] == 'failed' else 'orange' if edge_data['congestion'] > 50 else 'gray'
-                style = '--' if edge_data['status'] == 'failed' else '-'
-                nx.draw_networkx_edges(simulator.graph, pos, [(u, v)], edge_color=color, style=style, ax=ax)
-            
-            # Draw packet
-            if path_idx < len(simulator.packet_path) - 1:
-                start_pos = pos[simulator.packet_path[path_idx]]
-                end_pos = pos[simulator.packet_path[path_idx + 1]]
-                packet_x = start_pos[0] + t * (end_pos[0] - start_pos[0])
-                packet_y = start_pos[1] + t * (end_pos[1] - start_pos[1])
+                # Add packet stats text
+                ax.text(0.02, 0.98, self._stats_text(simulator), transform=ax.transAxes, fontsize=9, 
+                       verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
                 
-                # Packet body
-                packet_body = patches.Rectangle((packet_x-0.02, packet_y-0.015), 0.04, 0.03, 
-                                              facecolor='red', edgecolor='darkred', linewidth=1)
-                ax.add_patch(packet_body)
+                ax.set_title(f"Packet Transfer Animation - Frame {frame_num+1}/{total_frames}")
+                ax.axis('off')
                 
-                # Trail effect
-                for i in range(1, min(5, frame_num + 1)):
-                    trail_progress = max(0, progress - i * 0.3)
-                    trail_idx = int(trail_progress)
-                    if trail_idx < len(simulator.packet_path) - 1:
-                        trail_t = trail_progress - trail_idx
-                        trail_x = pos[simulator.packet_path[trail_idx]][0] + trail_t * (pos[simulator.packet_path[trail_idx + 1]][0] - pos[simulator.packet_path[trail_idx]][0])
-                        trail_y = pos[simulator.packet_path[trail_idx]][1] + trail_t * (pos[simulator.packet_path[trail_idx + 1]][1] - pos[simulator.packet_path[trail_idx]][1])
-                        ax.scatter(trail_x, trail_y, c='orange', s=10, alpha=0.7 - i*0.1)
-            
-            # Labels
-            nx.draw_networkx_labels(simulator.graph, pos, ax=ax, font_size=8)
-            
-            # Add packet stats text
-            stats_text = f"Packet ID: {simulator.packet_stats.get('packet_id', 'N/A')}\n"
-            stats_text += f"Packets: {simulator.packet_stats.get('num_packets', 1)} x {simulator.packet_stats.get('packet_size', 64)}KB\n"
-            stats_text += f"Hops: {simulator.packet_stats.get('hops', 0)} | Latency: {simulator.packet_stats.get('total_latency', 0):.1f}ms"
-            ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, fontsize=9, 
-                   verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-            
-            ax.set_title(f"Packet Transfer Animation - Frame {frame_num+1}/{total_frames}")
-            ax.axis('off')
-            
-            # Save frame to memory
-            buf = io.BytesIO()
-            fig.savefig(buf, format='png', dpi=80, bbox_inches='tight')
-            buf.seek(0)
-            self.frames.append(Image.open(buf))
-            plt.close(fig)
+                # Save frame to memory
+                buf = io.BytesIO()
+                fig.savefig(buf, format='png', dpi=80, bbox_inches='tight')
+                buf.seek(0)
+                self.frames.append(Image.open(buf))
         
-        return self.save_gif()
+        return self.save_gif(filename, fps)
     
-    def save_gif(self, filename='packet_animation.gif'):
+    def save_gif(self, filename='packet_animation.gif', fps=10):
         """Save frames as animated GIF"""
         if not self.frames:
             return None
@@ -104,7 +118,7 @@ class GifGenerator:
             filename,
             save_all=True,
             append_images=self.frames[1:],
-            duration=100,  # 100ms per frame = 10fps
+            duration=int(1000 / fps),
             loop=0
         )
         return filename
\ No newline at end of file
@@ -0,0 +1,120 @@
+import math
+
+import numpy as np
+
+
+class LinkSchedule:
+    """Time-varying link conditions stored as sorted event arrays
+
+    Each (router1, router2, attribute) key keeps its own sorted times and
+    values for point-in-time lookups, and all events are merged into one
+    sorted timeline so advancing the clock only touches events inside the
+    elapsed window. A value of None restores the link's original value.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.keys = []
+        self._key_ids = {}
+        self._times = []
+        self._key_column = []
+        self._values = []
+        self._compiled_version = -1
+
+    def __len__(self):
+        return len(self._times)
+
+    def copy(self):
+        """Independent copy of the schedule, for snapshots"""
+        clone = LinkSchedule()
+        clone.version = self.version
+        clone.keys = list(self.keys)
+        clone._key_ids = dict(self._key_ids)
+        clone._times = list(self._times)
+        clone._key_column = list(self._key_column)
+        clone._values = list(self._values)
+        return clone
+
+    def add_event(self, router1, router2, time, **attrs):
+        """Set link attributes at a simulated time (seconds)"""
+        for attr, value in attrs.items():
+            key = (router1, router2, attr)
+            if key not in self._key_ids:
+                self._key_ids[key] = len(self.keys)
+                self.keys.append(key)
+            self._times.append(float(time))
+            self._key_column.append(self._key_ids[key])
+            self._values.append(value)
+        self.version += 1
+
+    def add_diurnal_congestion(self, router1, router2, base=10, peak=80, peak_hour=14,
+                               period=86400, step=900, days=1, start=0):
+        """Sinusoidal daily congestion curve peaking at peak_hour"""
+        for t in np.arange(start, start + days * period, step):
+            phase = 2 * math.pi * (t - peak_hour * 3600) / period
+            congestion = base + (peak - base) * (1 + math.cos(phase)) / 2
+            self.add_event(router1, router2, t, congestion=int(round(congestion)))
+
+    def add_flapping(self, router1, router2, start, end, up_time=60, down_time=30):
+        """Alternate a link between failed and its normal status"""
+        t = start
+        while t < end:
+            self.add_event(router1, router2, t, status='failed')
+            self.add_event(router1, router2, min(t + down_time, end), status=None)
+            t += down_time + up_time
+
+    def add_maintenance(self, router1, router2, start, end):
+        """Take a link down for a maintenance window"""
+        self.add_event(router1, router2, start, status='failed')
+        self.add_event(router1, router2, end, status=None)
+
+    def _compile(self):
+        if self._compiled_version == self.version:
+            return
+        times = np.asarray(self._times, dtype=float)
+        keys = np.asarray(self._key_column, dtype=np.int64)
+        order = np.argsort(times, kind='stable')
+
+        # Merged timeline for window scans
+        self.event_times = times[order]
+        self.event_keys = keys[order]
+        self.event_values = [self._values[i] for i in order]
+
+        # Per-key sorted arrays for point-in-time lookups
+        self.link_times = []
+        self.link_values = []
+        key_order = order[np.argsort(keys[order], kind='stable')]
+        bounds = np.searchsorted(keys[key_order], np.arange(len(self.keys) + 1))
+        for key_id in range(len(self.keys)):
+            idx = key_order[bounds[key_id]:bounds[key_id + 1]]
+            self.link_times.append(times[idx])
+            self.link_values.append([self._values[i] for i in idx])
+        self._compiled_version = self.version
+
+    def changes_between(self, start, end):
+        """Final value of every key with an event in (start, end]"""
+        self._compile()
+        lo = np.searchsorted(self.event_times, start, side='right')
+        hi = np.searchsorted(self.event_times, end, side='right')
+        changes = {}
+        for i in range(lo, hi):
+            changes[self.keys[self.event_keys[i]]] = self.event_values[i]
+        return changes
+
+    def value_at(self, router1, router2, attr, time):
+        """Scheduled value at time, or None before the first event"""
+        key_id = self._key_ids.get((router1, router2, attr))
+        if key_id is None:
+            return None
+        self._compile()
+        idx = np.searchsorted(self.link_times[key_id], time, side='right') - 1
+        return self.link_values[key_id][idx] if idx >= 0 else None
+
+    def state_at(self, time):
+        """Scheduled value of every key at time (None means original value)"""
+        self._compile()
+        state = {}
+        for key_id, key in enumerate(self.keys):
+            idx = np.searchsorted(self.link_times[key_id], time, side='right') - 1
+            state[key] = self.link_values[key_id][idx] if idx >= 0 else None
+        return state
@@ -1,12 +1,24 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import time
 import os
 
 from network_core import NetworkSimulator
 from visualization import NetworkVisualizer
 from gif_generator import GifGenerator
+from video_generator import VideoGenerator
 from ui_components import UIComponents
+from topology_store import TopologyStore
+from export_cache import ExportCache
+
+@st.cache_resource
+def get_topology_store():
+    """Process-level store shared by every browser session"""
+    return TopologyStore()
+
+@st.cache_resource
+def get_export_cache():
+    """Rendered GIF/video exports shared by every browser session"""
+    return ExportCache()
 
 def main():
     st.set_page_config(page_title="Network Simulator", layout="wide")
@@ -32,20 +44,29 @@ def main():
         
         # Render UI components
         ui.render_quick_setup(sim)
+        ui.render_shared_topologies(sim, get_topology_store())
+        ui.render_snapshots(sim)
         ui.render_router_management(sim)
         ui.render_link_management(sim)
+        ui.render_link_schedule(sim)
         ui.render_simulation_controls(sim)
+        ui.render_forwarding(sim)
+        ui.render_fast_reroute(sim)
+        ui.render_traffic_equilibrium(sim)
         
-        # Auto-refresh for animation
-        if sim.animating:
-            time.sleep(0.1)
-            sim.animate_packet()
-            st.rerun()
+        # Opt-in frame capture for video export
+        viz.capture_frames = st.checkbox("🎥 Record Animation Frames", value=viz.capture_frames)
+        if len(viz.frame_buffer) > 1 and st.button("🎬 Export Video"):
+            with st.spinner("Encoding captured frames..."):
+                video_gen = VideoGenerator()
+                video_path = video_gen.create_cached_video(viz.frame_buffer, get_export_cache())
+                if video_path:
+                    st.success(f"Video saved as {video_path}")
         
         # GIF generation
         if sim.packet_path and st.button("🎞️ Generate GIF"):
             with st.spinner("Creating animated GIF..."):
-                gif_path = gif_gen.create_packet_gif(sim)
+                gif_path = gif_gen.create_cached_gif(sim, get_export_cache())
                 if gif_path:
                     st.session_state.show_gif = gif_path
                     st.success(f"GIF saved as {gif_path}")
@@ -53,7 +74,7 @@ def main():
                         st.download_button(
                             label="📥 Download GIF",
                             data=file.read(),
-                            file_name=gif_path,
+                            file_name=f"packet_animation_{os.path.basename(gif_path)[:8]}.gif",
                             mime="image/gif"
                         )
     
@@ -71,7 +92,8 @@ def main():
                     del st.session_state.show_gif
                     st.rerun()
         elif sim.graph.nodes:
-            fig, ax = plt.subplots(figsize=(10, 8))
+            ui.render_view_controls(sim, viz)
+            fig, ax = viz.get_figure(figsize=(10, 8))
             viz.draw_network(sim, fig, ax)
             st.pyplot(fig)
             ui.render_legend()
@@ -82,7 +104,14 @@ def main():
         
         ui.render_network_status(sim)
         ui.render_packet_stats(sim.packet_stats)
+        ui.render_flow_analytics(sim.analytics)
         ui.render_simulation_logs(sim.logs)
+    
+    # Auto-refresh for animation, after the current frame has been drawn
+    if sim.animating:
+        time.sleep(0.1)
+        sim.animate_packet()
+        st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
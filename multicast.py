@@ -0,0 +1,164 @@
+import heapq
+from collections import deque
+
+
+class MulticastTree:
+    """Delivery tree from one source to a set of receivers
+
+    parent maps every tree router except the source to its upstream
+    router. Copies of a packet split wherever a router has more than one
+    child, so each tree link carries exactly one copy.
+    """
+
+    def __init__(self, graph, source, parent, receivers):
+        self.source = source
+        self.parent = parent
+        self.children = {}
+        for child, up in parent.items():
+            self.children.setdefault(up, []).append(child)
+
+        # Latency and hop count from the source along the tree
+        self.cost = {source: 0}
+        self.hops = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for child in self.children.get(node, ()):
+                self.cost[child] = self.cost[node] + graph[node][child]['latency']
+                self.hops[child] = self.hops[node] + 1
+                queue.append(child)
+
+        receivers = [r for r in dict.fromkeys(receivers) if r != source]
+        self.receivers = [r for r in receivers if r in self.cost]
+        self.unreachable = [r for r in receivers if r not in self.cost]
+
+    @property
+    def nodes(self):
+        return self.cost.keys()
+
+    @property
+    def links(self):
+        return [(up, child) for child, up in self.parent.items()]
+
+    @property
+    def link_usage(self):
+        """Link transmissions for one multicast packet"""
+        return len(self.parent)
+
+    @property
+    def unicast_link_usage(self):
+        """Link transmissions if every receiver got its own unicast copy along the tree"""
+        return sum(self.hops[r] for r in self.receivers)
+
+    @property
+    def branch_points(self):
+        return [node for node, children in self.children.items() if len(children) > 1]
+
+    def receiver_costs(self):
+        return {r: self.cost[r] for r in self.receivers}
+
+    def leaf_paths(self):
+        """Source-to-leaf paths; together they cover every tree link once per leaf"""
+        paths = []
+        for leaf in self.cost:
+            if leaf in self.children or leaf == self.source:
+                continue
+            path = [leaf]
+            while path[-1] != self.source:
+                path.append(self.parent[path[-1]])
+            paths.append(path[::-1])
+        return paths
+
+
+def shortest_path_tree(simulator, source, receivers):
+    """Union of the shortest paths to receivers, from the cached SSSP tree"""
+    distances, previous = simulator.shortest_paths(source)
+    parent = {}
+    for receiver in receivers:
+        node = receiver
+        # Stop at the first router already in the tree
+        while node in previous and node not in parent:
+            parent[node] = previous[node]
+            node = previous[node]
+    return MulticastTree(simulator.graph, source, parent, receivers)
+
+
+def steiner_tree(graph, source, receivers):
+    """Mehlhorn's 2-approximate Steiner tree from one multi-source Dijkstra
+
+    The search grows from every terminal at once, labelling each router
+    with its nearest terminal. Links between two such regions give a
+    distance graph over the terminals whose minimum spanning tree,
+    expanded back into router paths, is the multicast tree.
+    """
+    terminals = list(dict.fromkeys([source, *receivers]))
+    dist = {t: 0 for t in terminals}
+    base = {t: t for t in terminals}
+    pred = {}
+    heap = [(0, i, t) for i, t in enumerate(terminals)]
+    counter = len(heap)
+    done = set()
+    while heap:
+        d, _, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        for neighbor, data in graph.adj[node].items():
+            if data['status'] == 'failed' or neighbor in done:
+                continue
+            nd = d + data['latency']
+            if neighbor not in dist or nd < dist[neighbor]:
+                dist[neighbor] = nd
+                base[neighbor] = base[node]
+                pred[neighbor] = node
+                heapq.heappush(heap, (nd, counter, neighbor))
+                counter += 1
+
+    # Cheapest bridge between every pair of neighbouring regions
+    bridges = {}
+    for u, v, data in graph.edges(data=True):
+        if data['status'] == 'failed' or u not in done or v not in done or base[u] == base[v]:
+            continue
+        key = frozenset((base[u], base[v]))
+        weight = dist[u] + data['latency'] + dist[v]
+        if key not in bridges or weight < bridges[key][0]:
+            bridges[key] = (weight, u, v)
+
+    # Kruskal over the terminal distance graph
+    root = {t: t for t in terminals}
+
+    def find(t):
+        while root[t] != t:
+            root[t] = root[root[t]]
+            t = root[t]
+        return t
+
+    adjacency = {}
+
+    def connect(a, b):
+        adjacency.setdefault(a, set()).add(b)
+        adjacency.setdefault(b, set()).add(a)
+
+    for weight, u, v in sorted(bridges.values(), key=lambda bridge: bridge[0]):
+        a, b = find(base[u]), find(base[v])
+        if a == b:
+            continue
+        root[a] = b
+        connect(u, v)
+        for end in (u, v):
+            while end in pred:
+                connect(end, pred[end])
+                end = pred[end]
+
+    # Orient the tree away from the source
+    parent = {}
+    queue = deque([source])
+    seen = {source}
+    while queue:
+        node = queue.popleft()
+        for neighbor in adjacency.get(node, ()):
+            if neighbor not in seen:
+                seen.add(neighbor)
+                parent[neighbor] = node
+                queue.append(neighbor)
+    return MulticastTree(graph, source, parent, receivers)
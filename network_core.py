@@ -1,16 +1,69 @@
-import networkx as nx
 import random
 import heapq
+import ipaddress
+from contextlib import contextmanager
 from datetime import datetime
 
+from packet_table import PacketTable, DELIVERED, EXPIRED
+from queueing import LinkQueueModel
+from multicast import shortest_path_tree, steiner_tree
+from flow_analytics import FlowAnalytics
+from change_journal import ChangeJournal, ADDED, REMOVED, ROUTING_ATTRS
+from connectivity import ConnectivityIndex
+from area_routing import AreaRouting
+from topology_store import RouteCache, SharedTopology
+
+
+LINK_ATTRS = ('latency', 'bandwidth', 'status', 'packet_loss', 'congestion')
+
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, 'tolist') else list(values)
+
+
+def _column(values, length, name):
+    """Broadcast a scalar, or check a per-link array, to length entries"""
+    if isinstance(values, (str, bytes)) or not hasattr(values, '__len__'):
+        return [values] * length
+    values = _as_list(values)
+    if len(values) != length:
+        raise ValueError(f"{name} has {len(values)} entries, expected {length}")
+    return values
+
+
+def _new_graph():
+    """Empty topology graph; networkx is imported on first use, not with this module"""
+    import networkx as nx
+    return nx.Graph()
+
+
+class Snapshot:
+    """Checkpoint of a simulator that shares its frozen graph instead of copying it"""
+    
+    def __init__(self, name, topology, state):
+        self.name = name
+        self.topology = topology
+        self.state = state
+        self.created = datetime.now()
+        self.seed = state['seed']
+
+
 class NetworkSimulator:
-    def __init__(self):
-        self.graph = nx.Graph()
+    def __init__(self, seed=None):
+        self.graph = _new_graph()
+        # Drives random topologies and packet IDs; part of every snapshot
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
         self.simulation_running = False
         self.logs = []
         self.packet_path = []
         self.packet_position = 0
         self.animating = False
+        # Every in-flight packet; packet_path/position follow the latest send
+        self.packets = PacketTable()
+        self.tracked_packet = None
+        # Tree of the latest multicast/broadcast send, if that was the last send
+        self.multicast = None
         self.packet_stats = {
             'start_time': None,
             'end_time': None,
@@ -23,30 +76,427 @@ class NetworkSimulator:
             'packet_size': 64
         }
         self.animation_frames = []
+        # Latency, hop and loss distributions of every send so far
+        self.analytics = FlowAnalytics()
+        
+        # Versioned log of which routers, links and attributes changed
+        self.journal = ChangeJournal()
+        self.journal.subscribe(self._on_change)
+        self.route_cache = RouteCache()
+        self._layout = None
+        # Components over active links, for instant "no path" answers
+        self.connectivity = ConnectivityIndex(self)
+        
+        # Simulated clock (seconds) driving the link-condition schedule
+        self.clock = 0.0
+        self.schedule = None
+        self._schedule_version = -1
+        self._schedule_baseline = {}
+        
+        # Optional per-link queueing model; congestion then follows the load
+        self.queue_model = None
+        
+        # Optional OSPF-style areas; dijkstra then routes hierarchically
+        self.areas = None
+        
+        # Shared read-only topology this session overlays (copy-on-write)
+        self.shared = None
+        self._owned_rows = None
+        self._owned_edges = None
+        self._owned_nodes = None
+        self._structure_shared = False
+        
+    @property
+    def version(self):
+        """Bumped by every committed topology change"""
+        return self.journal.version
+    
+    @property
+    def structure_version(self):
+        """Bumped when routers or links are added or removed"""
+        return self.journal.structure_version
+    
+    def _on_change(self, change):
+        if change.structural:
+            self._structure_shared = False
+        # Congestion, loss and prefix edits leave every shortest path intact
+        if change.affects(ROUTING_ATTRS, ()):
+            self.route_cache.clear()
+    
+    def _reset(self):
+        """Record that the whole graph was swapped out"""
+        self.journal.record_reset()
+        self.journal.commit()
+    
+    @contextmanager
+    def batch(self):
+        """Group mutations into one transaction with a single version bump"""
+        with self.journal.batch():
+            yield self
+    
+    def links_changed_since(self, version):
+        """Links whose attributes changed after version, or None if unknown"""
+        change = self.journal.since(version)
+        if change is None or change.structural:
+            return None
+        return change.changed_links()
+    
+    def attach(self, shared):
+        """Start viewing a shared topology without copying it"""
+        self.shared = shared
+        self.graph = shared.graph
+        self._owned_rows = None
+        self._owned_edges = None
+        self._owned_nodes = None
+        self.packet_path = []
+        self.packet_position = 0
+        self.animating = False
+        self.packets.clear()
+        self.tracked_packet = None
+        self.multicast = None
+        self.packet_stats['status'] = 'idle'
+        self._reset()
+        self._structure_shared = True
+        self.logs.append(f"Opened shared topology {shared.name}")
+    
+    def detach(self):
+        """Drop the shared topology and start from an empty private graph"""
+        if self.shared is not None:
+            self.shared = None
+            self.graph = _new_graph()
+            self._owned_rows = None
+            self._owned_edges = None
+            self._owned_nodes = None
+        else:
+            self.graph.clear()
+        self._reset()
+    
+    def reseed(self, seed):
+        """Restart the random stream used by generate_random_network and packet IDs"""
+        self.seed = seed
+        self.rng = random.Random(seed)
+    
+    def snapshot(self, name=None):
+        """Checkpoint the simulator; the graph is frozen and shared, not copied"""
+        if self.shared is not None and not self.diverged:
+            topology = self.shared
+        else:
+            topology = SharedTopology(name or f"snapshot-{self.version}", self.graph, copy=False)
+            if self._layout is not None and self._layout[0] == self.structure_version:
+                topology._layout = self._layout[1]
+            # Keep working on a copy-on-write shell over the now frozen graph
+            self.shared = topology
+            self._owned_rows = None
+            self._owned_edges = None
+            self._owned_nodes = None
+            self._structure_shared = True
+        
+        state = {
+            'seed': self.seed,
+            'rng_state': self.rng.getstate(),
+            'packet_path': list(self.packet_path),
+            'packet_position': self.packet_position,
+            'animating': self.animating,
+            'packets': self.packets.copy(),
+            'tracked_packet': self.tracked_packet,
+            'multicast': self.multicast,
+            'packet_stats': dict(self.packet_stats),
+            'logs': list(self.logs),
+            'analytics': self.analytics.copy(),
+            'clock': self.clock,
+            'schedule': self.schedule.copy() if self.schedule is not None else None,
+            'schedule_baseline': dict(self._schedule_baseline),
+            'queue_model': self.queue_model.copy() if self.queue_model is not None else None
+        }
+        return Snapshot(name or topology.name, topology, state)
+    
+    def restore(self, snapshot):
+        """Roll back to a snapshot; near-instant since the graph is shared"""
+        state = snapshot.state
+        self.shared = snapshot.topology
+        self.graph = snapshot.topology.graph
+        self._owned_rows = None
+        self._owned_edges = None
+        self._owned_nodes = None
+        # New version numbers so caches from other branches never match
+        self._reset()
+        self._structure_shared = True
+        
+        self.seed = state['seed']
+        self.rng = random.Random()
+        self.rng.setstate(state['rng_state'])
+        self.packet_path = list(state['packet_path'])
+        self.packet_position = state['packet_position']
+        self.animating = state['animating']
+        self.packets = state['packets'].copy()
+        self.tracked_packet = state['tracked_packet']
+        self.multicast = state['multicast']
+        self.packet_stats = dict(state['packet_stats'])
+        self.logs = list(state['logs'])
+        self.analytics = state['analytics'].copy()
+        self.clock = state['clock']
+        self.schedule = state['schedule'].copy() if state['schedule'] is not None else None
+        self._schedule_version = self.schedule.version if self.schedule is not None else -1
+        self._schedule_baseline = dict(state['schedule_baseline'])
+        self.queue_model = state['queue_model'].copy() if state['queue_model'] is not None else None
+    
+    @property
+    def diverged(self):
+        """True once this session has edited its view of a shared topology"""
+        return self._owned_rows is not None
+    
+    def _own_rows(self, *nodes):
+        """Copy-on-write: privatize the adjacency rows about to be modified"""
+        if self.shared is None:
+            return
+        if self._owned_rows is None:
+            # First write: a private shell whose rows still point at the shared graph
+            shell = _new_graph()
+            shell.graph.update(self.graph.graph)
+            shell._node = dict(self.graph._node)
+            shell._adj = dict(self.graph._adj)
+            self.graph = shell
+            self._owned_rows = set()
+            self._owned_edges = set()
+            self._owned_nodes = set()
+        adj = self.graph._adj
+        for node in nodes:
+            if node in adj and node not in self._owned_rows:
+                adj[node] = dict(adj[node])
+                self._owned_rows.add(node)
+    
+    def _own_edge(self, router1, router2):
+        """Copy-on-write: privatize one link's attribute dict"""
+        self._own_rows(router1, router2)
+        if self.shared is None:
+            return
+        key = frozenset((router1, router2))
+        adj = self.graph._adj
+        if key not in self._owned_edges and router2 in adj.get(router1, {}):
+            data = dict(adj[router1][router2])
+            adj[router1][router2] = data
+            adj[router2][router1] = data
+            self._owned_edges.add(key)
+    
+    def _own_node(self, router_id):
+        """Copy-on-write: privatize one router's attribute dict"""
+        self._own_rows(router_id)
+        if self.shared is None:
+            return
+        if router_id in self.graph._node and router_id not in self._owned_nodes:
+            self.graph._node[router_id] = dict(self.graph._node[router_id])
+            self._owned_nodes.add(router_id)
         
     def add_router(self, router_id):
+        self._own_node(router_id)
+        self.journal.record_node(router_id, {'status'} if router_id in self.graph._node else ADDED)
         self.graph.add_node(router_id, status='active')
+        self.journal.commit()
         
     def remove_router(self, router_id):
         if router_id in self.graph.nodes:
+            neighbors = list(self.graph.neighbors(router_id))
+            self._own_rows(router_id, *neighbors)
+            self.journal.record_node(router_id, REMOVED)
+            self.journal.record_edges([(router_id, neighbor) for neighbor in neighbors], REMOVED)
             self.graph.remove_node(router_id)
+            self.journal.commit()
             
     def add_link(self, router1, router2, latency=10, bandwidth=100):
+        self._own_edge(router1, router2)
+        self._record_new_links([(router1, router2)])
         self.graph.add_edge(router1, router2, 
                           latency=latency, 
                           bandwidth=bandwidth, 
                           status='active',
                           packet_loss=0,
                           congestion=0)
+        self.journal.commit()
+    
+    def _record_new_links(self, pairs):
+        """Journal links about to be added: new ones, or attribute resets of existing ones"""
+        nodes, adj = self.graph._node, self.graph._adj
+        self.journal.record_nodes([r for r in dict.fromkeys(r for pair in pairs for r in pair)
+                                   if r not in nodes], ADDED)
+        existing = [v in adj.get(u, ()) for u, v in pairs]
+        self.journal.record_edges([pair for pair, old in zip(pairs, existing) if old], LINK_ATTRS)
+        self.journal.record_edges([pair for pair, old in zip(pairs, existing) if not old], ADDED)
         
     def remove_link(self, router1, router2):
         if self.graph.has_edge(router1, router2):
+            self._own_rows(router1, router2)
+            self.journal.record_edge(router1, router2, REMOVED)
             self.graph.remove_edge(router1, router2)
+            self.journal.commit()
             
     def update_link(self, router1, router2, **kwargs):
         if self.graph.has_edge(router1, router2):
+            self._own_edge(router1, router2)
             for key, value in kwargs.items():
                 self.graph[router1][router2][key] = value
+            self.journal.record_edge(router1, router2, kwargs.keys())
+            self.journal.commit()
+    
+    def add_routers(self, router_ids):
+        """Add routers that are not in the graph yet, in one transaction"""
+        new = [r for r in dict.fromkeys(_as_list(router_ids)) if r not in self.graph._node]
+        if not new:
+            return
+        with self.batch():
+            for router_id in new:
+                self._own_node(router_id)
+            self.journal.record_nodes(new, ADDED)
+            self.graph.add_nodes_from(new, status='active')
+    
+    def add_links(self, routers1, routers2, latencies=10, bandwidths=100):
+        """Add many links at once; attributes may be arrays or scalars"""
+        routers1, routers2 = _as_list(routers1), _as_list(routers2)
+        if len(routers1) != len(routers2):
+            raise ValueError("routers1 and routers2 must have the same length")
+        latencies = _column(latencies, len(routers1), 'latencies')
+        bandwidths = _column(bandwidths, len(routers1), 'bandwidths')
+        
+        with self.batch():
+            for u, v in zip(routers1, routers2):
+                self._own_edge(u, v)
+            self._record_new_links(list(zip(routers1, routers2)))
+            self.graph.add_edges_from(
+                (u, v, {'latency': latency, 'bandwidth': bandwidth, 'status': 'active',
+                        'packet_loss': 0, 'congestion': 0})
+                for u, v, latency, bandwidth in zip(routers1, routers2, latencies, bandwidths))
+    
+    def update_links(self, edge_ids, **columns):
+        """Set link attributes from per-link arrays (or scalars) in one transaction"""
+        edge_ids = _as_list(edge_ids)
+        columns = {key: _column(value, len(edge_ids), key) for key, value in columns.items()}
+        
+        with self.batch():
+            changed = []
+            for i, (u, v) in enumerate(edge_ids):
+                if v not in self.graph._adj.get(u, ()):
+                    continue
+                # Copy-on-write may swap in a new graph and rows; look the link up afterwards
+                self._own_edge(u, v)
+                data = self.graph._adj[u][v]
+                for key, values in columns.items():
+                    data[key] = values[i]
+                changed.append((u, v))
+            self.journal.record_edges(changed, columns)
+    
+    def remove_links(self, edge_ids):
+        """Remove many links in one transaction, skipping missing ones"""
+        edges = [(u, v) for u, v in _as_list(edge_ids) if self.graph.has_edge(u, v)]
+        if not edges:
+            return
+        with self.batch():
+            for u, v in edges:
+                self._own_rows(u, v)
+            self.journal.record_edges(edges, REMOVED)
+            self.graph.remove_edges_from(edges)
+    
+    def set_queueing(self, enabled, buffer_kb=1024):
+        """Turn the per-link FIFO queueing model on or off"""
+        if not enabled:
+            self.queue_model = None
+        elif self.queue_model is None or self.queue_model.buffer_kb != buffer_kb:
+            self.queue_model = LinkQueueModel(buffer_kb)
+    
+    def set_areas(self, enabled, attr=None, area_size=200):
+        """Route through areas taken from a router attribute (or partitioned automatically) instead of one flat SPF"""
+        if not enabled:
+            self.areas = None
+        elif self.areas is None or (self.areas.attr, self.areas.area_size) != (attr, area_size):
+            self.areas = AreaRouting(self, attr, area_size)
+    
+    def _update_queue_congestion(self):
+        """Write queue occupancy back as link congestion, only where it changed"""
+        model = self.queue_model
+        occupancy = model.occupancy().round().astype(model.congestion.dtype)
+        changed = (occupancy != model.congestion).nonzero()[0]
+        if len(changed):
+            model.congestion = occupancy
+            self.update_links([model.edges[i] for i in changed], congestion=occupancy[changed])
+    
+    def set_schedule(self, schedule):
+        """Drive link conditions from a LinkSchedule on the simulated clock"""
+        if self.schedule is not None:
+            # Put every scheduled attribute back before switching schedules
+            self._apply_link_conditions({key: None for key in self._schedule_baseline})
+        self.schedule = schedule
+        self._schedule_version = -1
+        self._schedule_baseline = {}
+        self.set_clock(self.clock)
+    
+    def advance_clock(self, seconds):
+        self.set_clock(self.clock + seconds)
+    
+    def set_clock(self, time):
+        """Move the simulated clock, applying only the scheduled changes in between"""
+        if self.schedule is not None:
+            if time >= self.clock and self._schedule_version == self.schedule.version:
+                updates = self.schedule.changes_between(self.clock, time)
+            else:
+                # Rewind, or the schedule changed: resolve every key by binary search
+                updates = self.schedule.state_at(time)
+                self._schedule_version = self.schedule.version
+            self._apply_link_conditions(updates)
+        if self.queue_model is not None and time > self.clock:
+            self.queue_model.sync(self)
+            self.queue_model.step((time - self.clock) * 1000)
+            self._update_queue_congestion()
+        self.clock = time
+    
+    def _apply_link_conditions(self, updates):
+        columns = {}
+        for (router1, router2, attr), value in updates.items():
+            if not self.graph.has_edge(router1, router2):
+                continue
+            key = (router1, router2, attr)
+            if key not in self._schedule_baseline:
+                self._schedule_baseline[key] = self.graph[router1][router2][attr]
+            if value is None:
+                value = self._schedule_baseline[key]
+            edges, values = columns.setdefault(attr, ([], []))
+            edges.append((router1, router2))
+            values.append(value)
+        
+        with self.batch():
+            for attr, (edges, values) in columns.items():
+                self.update_links(edges, **{attr: values})
+    
+    def assign_prefixes(self, router_id, prefixes):
+        """Attach IPv4 prefixes (e.g. '10.0.1.0/24') to a router"""
+        if router_id in self.graph.nodes:
+            self._own_node(router_id)
+            self.graph.nodes[router_id]['prefixes'] = tuple(prefixes)
+            self.journal.record_node(router_id, {'prefixes'})
+            self.journal.commit()
+    
+    def auto_assign_prefixes(self, base='10.0.0.0/8', prefix_len=24):
+        """Give every router its own consecutive subnet carved from base"""
+        subnets = ipaddress.IPv4Network(base).subnets(new_prefix=prefix_len)
+        with self.batch():
+            for router_id, subnet in zip(list(self.graph.nodes), subnets):
+                self.assign_prefixes(router_id, [str(subnet)])
+    
+    def layout(self):
+        """Router positions, cached until the topology structure changes"""
+        if self.shared is not None and self._structure_shared:
+            return self.shared.layout()
+        if self._layout is None or self._layout[0] != self.structure_version:
+            import networkx as nx
+            self._layout = (self.structure_version, nx.spring_layout(self.graph, seed=42))
+        return self._layout[1]
+    
+    def shortest_paths(self, source, store=True):
+        """Cached (distances, previous) shortest-path tree rooted at source
+
+        store=False still reads the cache but does not add to it, so a sweep
+        over every router does not evict the trees queries keep reusing.
+        """
+        if self.shared is not None and not self.diverged:
+            return self.shared.route_cache.get(source, self._shortest_path_tree, store)
+        return self.route_cache.get(source, self._shortest_path_tree, store)
                 
     def dijkstra(self, start, end):
         if start not in self.graph.nodes or end not in self.graph.nodes:
@@ -54,7 +504,31 @@ class NetworkSimulator:
             
         if start == end:
             return [start], 0
+        
+        # Routers in different components: no need to search one exhaustively
+        if not self.connectivity.connected(start, end):
+            return [], float('inf')
+        
+        if self.areas is not None:
+            return self.areas.route(start, end)
+        
+        distances, previous = self.shortest_paths(start)
+        
+        if end not in distances:
+            return [], float('inf')
+            
+        path = []
+        current = end
+        while current in previous:
+            path.append(current)
+            current = previous[current]
+        path.append(start)
+        path.reverse()
             
+        return path, distances[end]
+    
+    def _shortest_path_tree(self, start):
+        adj = self.graph._adj
         distances = {start: 0}
         previous = {}
         visited = set()
@@ -67,14 +541,10 @@ class NetworkSimulator:
                 continue
             visited.add(current)
             
-            if current == end:
-                break
-                
-            for neighbor in self.graph.neighbors(current):
+            for neighbor, edge_data in adj[current].items():
                 if neighbor in visited:
                     continue
                     
-                edge_data = self.graph[current][neighbor]
                 if edge_data['status'] == 'failed':
                     continue
                     
@@ -86,25 +556,27 @@ class NetworkSimulator:
                     previous[neighbor] = current
                     heapq.heappush(pq, (distance, neighbor))
         
-        if end not in distances:
-            return [], float('inf')
-            
-        path = []
-        current = end
-        while current in previous:
-            path.append(current)
-            current = previous[current]
-        path.append(start)
-        path.reverse()
-            
-        return path, distances[end]
+        return distances, previous
     
     def simulate_packet(self, start, end, num_packets=1, packet_size=64):
         path, total_cost = self.dijkstra(start, end)
         if path:
+            delays = self._queue_burst(path, num_packets, packet_size)
+            launched = delays['delivered'] if delays else num_packets
+            ids = self.packets.launch(path, count=launched, ttl=64, spacing=0.3)
+            self.multicast = None
             self.packet_path = path
             self.packet_position = 0
-            self.animating = True
+            self.animating = len(self.packets) > 0
+            # Follow the last packet of the burst; it is the last to arrive
+            self.tracked_packet = int(ids[-1]) if len(ids) else None
+            
+            if len(ids) > 1:
+                packet_id = f"PKT_{ids[0]}-{ids[-1]}"
+            elif len(ids):
+                packet_id = f"PKT_{ids[0]}"
+            else:
+                packet_id = None
             
             self.packet_stats = {
                 'start_time': datetime.now(),
@@ -112,63 +584,169 @@ class NetworkSimulator:
                 'ttl': 64,
                 'hops': len(path) - 1,
                 'total_latency': total_cost,
-                'packet_id': f"PKT_{random.randint(1000, 9999)}",
-                'status': 'transmitting',
+                'packet_id': packet_id,
+                'status': 'transmitting' if len(ids) else 'dropped',
                 'source': start,
                 'destination': end,
                 'num_packets': num_packets,
                 'packet_size': packet_size
             }
+            if delays:
+                hop_delays = delays.pop('hop_delays')
+                self.packet_stats.update(delays)
+                self.analytics.record(path, delays['total_latency'], hop_delays, num_packets, launched)
+            else:
+                hop_delays = [self.graph[u][v]['latency'] for u, v in zip(path, path[1:])]
+                self.analytics.record(path, total_cost, hop_delays, num_packets)
             
             log_entry = f"{num_packets} packet(s) ({packet_size}KB each) {self.packet_stats['packet_id']} routed from {start} to {end}: {' -> '.join(path)} (Cost: {total_cost:.2f}ms)"
+            if delays:
+                log_entry += f", {self.packet_stats['total_latency']:.2f}ms under load, {delays['dropped']} dropped"
             self.logs.append(log_entry)
             return True
         else:
             log_entry = f"No path found from {start} to {end}"
+            if start != end and not self.connectivity.connected(start, end):
+                log_entry += " (network partitioned)"
             self.logs.append(log_entry)
             return False
     
+    def simulate_multicast(self, start, receivers=None, steiner=False, packet_size=64):
+        """Send one packet to many receivers (all routers if None) over a single tree
+        
+        The tree comes from one shortest-path computation: the cached SSSP
+        tree from start, or with steiner=True a Steiner approximation that
+        trades longer paths for fewer links. One copy is launched per tree
+        leaf, so the copies share links up to each branch point and split there.
+        """
+        if start not in self.graph.nodes:
+            return False
+        mode = 'broadcast' if receivers is None else 'multicast'
+        if receivers is None:
+            receivers = [node for node in self.graph.nodes if node != start]
+        if steiner:
+            tree = steiner_tree(self.graph, start, receivers)
+        else:
+            tree = shortest_path_tree(self, start, receivers)
+        
+        if not tree.receivers:
+            self.logs.append(f"No path found from {start} to any {mode} receiver")
+            return False
+        
+        paths = tree.leaf_paths()
+        ids = [int(self.packets.launch(path, ttl=64)[0]) for path in paths]
+        last = max(range(len(paths)), key=lambda i: len(paths[i]))
+        self.multicast = tree
+        self.packet_path = paths[last]
+        self.packet_position = 0
+        self.animating = True
+        self.tracked_packet = ids[last]
+        
+        costs = tree.receiver_costs()
+        for receiver, cost in costs.items():
+            self.analytics.record_flow(start, receiver, cost, tree.hops[receiver])
+        for up, child in tree.links:
+            self.analytics.record_link(up, child, tree.cost[child] - tree.cost[up])
+        self.packet_stats = {
+            'start_time': datetime.now(),
+            'end_time': None,
+            'ttl': 64,
+            'hops': max(tree.hops[r] for r in tree.receivers),
+            'total_latency': max(costs.values()),
+            'packet_id': f"PKT_{ids[0]}-{ids[-1]}" if len(ids) > 1 else f"PKT_{ids[0]}",
+            'status': 'transmitting',
+            'source': start,
+            'destination': f"{len(tree.receivers)} receivers",
+            'num_packets': 1,
+            'packet_size': packet_size,
+            'mode': f"{mode} ({'Steiner' if steiner else 'shortest-path'} tree)",
+            'receiver_costs': costs,
+            'unreachable': len(tree.unreachable),
+            'link_usage': tree.link_usage,
+            'unicast_link_usage': tree.unicast_link_usage,
+            'branch_points': len(tree.branch_points)
+        }
+        self.logs.append(f"{mode.capitalize()} {self.packet_stats['packet_id']} from {start} to {len(tree.receivers)} receivers: "
+                         f"{tree.link_usage} link transmissions vs {tree.unicast_link_usage} unicast, "
+                         f"{len(tree.unreachable)} unreachable")
+        return True
+    
+    def _queue_burst(self, path, num_packets, packet_size):
+        """Run a burst through the queueing model, if enabled"""
+        if self.queue_model is None or len(path) < 2:
+            return None
+        model = self.queue_model
+        model.sync(self)
+        hops = [model.index[frozenset(edge)] for edge in zip(path, path[1:])]
+        latencies = [self.graph[u][v]['latency'] for u, v in zip(path, path[1:])]
+        delays = model.send(hops, latencies, num_packets, packet_size)
+        self._update_queue_congestion()
+        return delays
+    
     def animate_packet(self):
-        if self.animating and self.packet_path:
-            self.packet_position += 0.1
-            self.packet_stats['ttl'] = max(0, self.packet_stats['ttl'] - 0.1)
+        if self.animating:
+            # Each animation tick is 0.1s of simulated time
+            self.advance_clock(0.1)
+            retired_ids, retired_status = self.packets.step(0.1)
+            self.animating = len(self.packets) > 0
+            
+            row = self.packets.find(self.tracked_packet)
+            if row is not None:
+                self.packet_position = max(0.0, float(self.packets.positions[row]))
+                self.packet_stats['ttl'] = int(self.packets.ttl[row])
             
-            if self.packet_position >= len(self.packet_path) - 1:
-                self.animating = False
+            tracked = retired_ids == self.tracked_packet
+            if tracked.any():
                 self.packet_position = 0
                 self.packet_stats['end_time'] = datetime.now()
-                self.packet_stats['status'] = 'delivered'
+                expired = retired_status[tracked][0] == EXPIRED
+                self.packet_stats['status'] = 'expired' if expired else 'delivered'
+                self.tracked_packet = None
                 
                 if self.packet_stats['start_time']:
                     time_taken = (self.packet_stats['end_time'] - self.packet_stats['start_time']).total_seconds()
-                    self.logs.append(f"Packet {self.packet_stats['packet_id']} delivered in {time_taken:.2f}s")
+                    self.logs.append(f"Packet {self.packet_stats['packet_id']} {self.packet_stats['status']} in {time_taken:.2f}s")
+            
+            # Everything else retired this tick is summarized in one line
+            others = retired_status[~tracked]
+            if others.size:
+                delivered = int((others == DELIVERED).sum())
+                self.logs.append(f"{delivered} packet(s) delivered, {others.size - delivered} expired")
     
-    def generate_random_network(self, num_routers=5):
-        self.graph.clear()
+    def reset_network(self):
+        """Empty private topology with packets and logs cleared"""
+        self.detach()
         self.packet_path = []
+        self.packets.clear()
+        self.multicast = None
+        self.animating = False
         self.logs = []
         self.packet_stats['status'] = 'idle'
+    
+    def generate_random_network(self, num_routers=5):
+        self.reset_network()
         
-        for i in range(num_routers):
-            self.add_router(f"R{i+1}")
-        
-        routers = list(self.graph.nodes)
-        for i in range(1, len(routers)):
-            r1 = routers[random.randint(0, i-1)]
-            r2 = routers[i]
-            latency = random.randint(5, 50)
-            bandwidth = random.choice([10, 50, 100, 1000])
-            self.add_link(r1, r2, latency, bandwidth)
-        
-        for _ in range(random.randint(0, num_routers)):
-            r1, r2 = random.sample(routers, 2)
-            if not self.graph.has_edge(r1, r2):
-                latency = random.randint(5, 50)
-                bandwidth = random.choice([10, 50, 100, 1000])
+        with self.batch():
+            for i in range(num_routers):
+                self.add_router(f"R{i+1}")
+            
+            routers = list(self.graph.nodes)
+            for i in range(1, len(routers)):
+                r1 = routers[self.rng.randint(0, i-1)]
+                r2 = routers[i]
+                latency = self.rng.randint(5, 50)
+                bandwidth = self.rng.choice([10, 50, 100, 1000])
                 self.add_link(r1, r2, latency, bandwidth)
-        
-        for u, v in list(self.graph.edges):
-            if random.random() < 0.3:
-                self.update_link(u, v, congestion=random.randint(20, 80))
-            if random.random() < 0.1:
-                self.update_link(u, v, status='failed')
\ No newline at end of file
+            
+            for _ in range(self.rng.randint(0, num_routers)):
+                r1, r2 = self.rng.sample(routers, 2)
+                if not self.graph.has_edge(r1, r2):
+                    latency = self.rng.randint(5, 50)
+                    bandwidth = self.rng.choice([10, 50, 100, 1000])
+                    self.add_link(r1, r2, latency, bandwidth)
+            
+            for u, v in list(self.graph.edges):
+                if self.rng.random() < 0.3:
+                    self.update_link(u, v, congestion=self.rng.randint(20, 80))
+                if self.rng.random() < 0.1:
+                    self.update_link(u, v, status='failed')
\ No newline at end of file
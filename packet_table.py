@@ -0,0 +1,184 @@
+import numpy as np
+
+TRANSMITTING = 0
+DELIVERED = 1
+EXPIRED = 2
+
+
+class PacketTable:
+    """In-flight packets stored as parallel arrays (struct of arrays)
+
+    Paths are interned once and referenced by id. A packet's position is
+    measured in hops along its path; negative positions have not left the
+    source yet. step() advances every packet with a few array operations
+    and retires delivered or expired packets in bulk.
+    """
+
+    COLUMNS = ('ids', 'path_ids', 'positions', 'ttl', 'status')
+
+    def __init__(self, capacity=1024):
+        self.next_id = 1
+        self.paths = []
+        self._path_ids = {}
+        self.path_hops = np.empty(0, dtype=np.int64)
+        self.count = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.path_ids = np.empty(capacity, dtype=np.int64)
+        self.positions = np.empty(capacity, dtype=float)
+        self.ttl = np.empty(capacity, dtype=np.int64)
+        self.status = np.empty(capacity, dtype=np.int8)
+        self._coords = None
+
+    def __len__(self):
+        return self.count
+
+    def intern_path(self, path):
+        """Id of a path, storing it once however many packets use it"""
+        key = tuple(path)
+        path_id = self._path_ids.get(key)
+        if path_id is None:
+            path_id = self._path_ids[key] = len(self.paths)
+            self.paths.append(key)
+            self.path_hops = np.append(self.path_hops, len(key) - 1)
+        return path_id
+
+    def _reserve(self, extra):
+        needed = self.count + extra
+        if needed <= len(self.ids):
+            return
+        capacity = max(needed, 2 * len(self.ids))
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def launch(self, path, count=1, ttl=64, spacing=0.0):
+        """Add count packets on path, each spacing hops behind the previous"""
+        path_id = self.intern_path(path)
+        self._reserve(count)
+        new_ids = np.arange(self.next_id, self.next_id + count, dtype=np.int64)
+        self.next_id += count
+
+        rows = slice(self.count, self.count + count)
+        self.ids[rows] = new_ids
+        self.path_ids[rows] = path_id
+        self.positions[rows] = -spacing * np.arange(count)
+        self.ttl[rows] = ttl
+        self.status[rows] = TRANSMITTING
+        self.count += count
+        return new_ids
+
+    def step(self, dt=0.1):
+        """Advance every packet by dt hops and retire the finished ones
+
+        Returns (ids, status) of the retired packets.
+        """
+        n = self.count
+        positions = self.positions[:n]
+        hops_before = np.floor(positions)
+        positions += dt
+        # TTL drops by one at every router a packet reaches after the source
+        crossed = np.maximum(np.floor(positions), 0) - np.maximum(hops_before, 0)
+        self.ttl[:n] -= crossed.astype(np.int64)
+
+        status = self.status[:n]
+        status[positions >= self.path_hops[self.path_ids[:n]]] = DELIVERED
+        status[(status == TRANSMITTING) & (self.ttl[:n] <= 0)] = EXPIRED
+
+        done = status != TRANSMITTING
+        retired = (self.ids[:n][done].copy(), status[done].copy())
+        if retired[0].size:
+            keep = ~done
+            kept = int(keep.sum())
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[:kept] = column[:n][keep]
+            self.count = kept
+            # Keep the interned paths bounded by the ones still in use
+            if len(self.paths) > 2 * kept + 16:
+                self._compact()
+        return retired
+
+    def _compact(self):
+        """Forget interned paths no packet uses any more, renumbering the rest"""
+        n = self.count
+        live = np.unique(self.path_ids[:n])
+        if len(live) == len(self.paths):
+            return
+        remap = np.full(len(self.paths), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+        self.paths = [self.paths[i] for i in live]
+        self._path_ids = {path: i for i, path in enumerate(self.paths)}
+        self.path_hops = self.path_hops[live]
+        self.path_ids[:n] = remap[self.path_ids[:n]]
+        self._coords = None
+
+    def _path_coordinates(self, pos, live):
+        """Router coordinates of the live paths, flattened end to end, and where each path starts
+
+        Coordinates are cached per path for one layout. A path through a
+        router the layout no longer has (it was removed while the packet
+        was in flight) gets NaN coordinates instead of failing.
+        """
+        if self._coords is None or self._coords[0] is not pos:
+            self._coords = (pos, {})
+        cache = self._coords[1]
+        parts = []
+        for path_id in live:
+            coords = cache.get(path_id)
+            if coords is None:
+                path = self.paths[path_id]
+                coords = cache[path_id] = np.array([pos.get(node, (np.nan, np.nan)) for node in path],
+                                                   dtype=float).reshape(-1, 2)
+            parts.append(coords)
+        starts = np.zeros(len(self.paths), dtype=np.int64)
+        if not parts:
+            return np.empty((0, 2)), starts
+        starts[live] = np.cumsum([0] + [len(coords) for coords in parts])[:-1]
+        return np.concatenate(parts), starts
+
+    def interpolate(self, pos, lags=(0.0,)):
+        """Layout coordinates of every packet, lag hops behind its position
+
+        Returns xy with shape (packets, len(lags), 2) and a mask of the
+        points that have already left the source (and can still be placed).
+        """
+        n = self.count
+        flat, starts = self._path_coordinates(pos, np.unique(self.path_ids[:n]))
+        path_ids = self.path_ids[:n, None]
+        hops = self.path_hops[path_ids]
+        progress = self.positions[:n, None] - np.asarray(lags, dtype=float)[None, :]
+        valid = progress >= 0
+
+        segment = np.clip(np.floor(progress), 0, np.maximum(hops - 1, 0)).astype(np.int64)
+        t = np.clip(progress - segment, 0.0, 1.0)[..., None]
+        start = starts[path_ids] + segment
+        end = start + (hops > 0)
+        xy = flat[start] + t * (flat[end] - flat[start])
+        return xy, valid & np.isfinite(xy).all(axis=-1)
+
+    def find(self, packet_id):
+        """Row of an in-flight packet, or None"""
+        rows = np.flatnonzero(self.ids[:self.count] == packet_id)
+        return int(rows[0]) if rows.size else None
+
+    def clear(self):
+        self.count = 0
+        self.paths = []
+        self._path_ids = {}
+        self.path_hops = np.empty(0, dtype=np.int64)
+        self._coords = None
+
+    def copy(self):
+        """Independent copy of the table, for snapshots"""
+        clone = PacketTable(capacity=max(1, self.count))
+        clone.next_id = self.next_id
+        clone.paths = list(self.paths)
+        clone._path_ids = dict(self._path_ids)
+        clone.path_hops = self.path_hops.copy()
+        clone.count = self.count
+        for name in self.COLUMNS:
+            getattr(clone, name)[:self.count] = getattr(self, name)[:self.count]
+        clone._compact()
+        return clone
@@ -0,0 +1,227 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from change_journal import ROUTING_ATTRS
+
+INF = float('inf')
+
+
+def graph_to_csr(graph):
+    """Active links as CSR arrays (indptr, indices, latency weights)"""
+    nodes = list(graph.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indices, weights = [], []
+    for i, node in enumerate(nodes):
+        for neighbor, data in graph.adj[node].items():
+            if data['status'] != 'failed':
+                indices.append(index[neighbor])
+                weights.append(data['latency'])
+        indptr[i + 1] = len(indices)
+    return nodes, indptr, np.array(indices, dtype=np.int64), np.array(weights, dtype=float)
+
+
+def _create_shared(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm
+
+
+def _spec(shm, array):
+    return (shm.name, array.shape, array.dtype.str)
+
+
+def _view(shm, spec):
+    _, shape, dtype = spec
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def sssp(indptr, indices, weights, source, n):
+    """Dijkstra over CSR lists; returns distances, first hops and predecessors"""
+    dist = [INF] * n
+    first = [-1] * n
+    prev = [-1] * n
+    done = [False] * n
+    dist[source] = 0.0
+    first[source] = source
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if done[u]:
+            continue
+        done[u] = True
+        first_u = first[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + weights[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                prev[v] = u
+                first[v] = v if u == source else first_u
+                heapq.heappush(heap, (nd, v))
+    return dist, first, prev
+
+
+# Worker-side attachment to the most recently published graph
+_worker_graph = {}
+
+
+def _worker_csr(graph_specs):
+    key = tuple(spec[0] for spec in graph_specs)
+    if _worker_graph.get('key') != key:
+        for shm in _worker_graph.get('shms', ()):
+            shm.close()
+        shms = [shared_memory.SharedMemory(name=spec[0]) for spec in graph_specs]
+        # Plain lists are much faster than array indexing in the Dijkstra loop
+        lists = [_view(shm, spec).tolist() for shm, spec in zip(shms, graph_specs)]
+        _worker_graph.update(key=key, shms=shms, lists=lists)
+    return _worker_graph['lists']
+
+
+def _fill_rows(csr, outputs, sources, rows):
+    indptr, indices, weights = csr
+    dist_out, hop_out, prev_out = outputs
+    for source, row in zip(sources, rows):
+        dist, first, prev = sssp(indptr, indices, weights, source, len(indptr) - 1)
+        dist_out[row] = dist
+        hop_out[row] = first
+        prev_out[row] = prev
+
+
+def _solve_rows(graph_specs, out_specs, sources, rows):
+    """Fill output rows for a chunk of sources, writing straight into shared memory"""
+    csr = _worker_csr(graph_specs)
+    shms = [shared_memory.SharedMemory(name=spec[0]) for spec in out_specs]
+    try:
+        _fill_rows(csr, [_view(shm, spec) for shm, spec in zip(shms, out_specs)], sources, rows)
+    finally:
+        for shm in shms:
+            shm.close()
+    return len(rows)
+
+
+class RouteMatrix:
+    """Distances, first hops and predecessors for a set of source routers"""
+
+    def __init__(self, nodes, sources, distances, next_hops, predecessors):
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.sources = sources
+        self.rows = {source: row for row, source in enumerate(sources)}
+        self.distances = distances
+        self.next_hops = next_hops
+        self.predecessors = predecessors
+
+    def cost(self, start, end):
+        return float(self.distances[self.rows[start], self.index[end]])
+
+    def next_hop(self, start, end):
+        hop = self.next_hops[self.rows[start], self.index[end]]
+        return self.nodes[hop] if hop >= 0 else None
+
+    def path(self, start, end):
+        """Path and cost, matching NetworkSimulator.dijkstra's return shape"""
+        row = self.rows[start]
+        target = self.index[end]
+        if not np.isfinite(self.distances[row, target]):
+            return [], INF
+        path = [target]
+        while path[-1] != self.index[start]:
+            path.append(int(self.predecessors[row, path[-1]]))
+        return [self.nodes[i] for i in reversed(path)], float(self.distances[row, target])
+
+
+class ParallelRouteExecutor:
+    """Batch shortest-path queries spread over worker processes
+
+    The graph is published once per topology version as CSR arrays in
+    shared memory; workers attach to it by name and write results into
+    shared output arrays, so neither graphs nor results are pickled.
+    """
+
+    def __init__(self, simulator, workers=None, chunk_size=64):
+        self.simulator = simulator
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.nodes = []
+        self._graph_shms = []
+        self._graph_specs = None
+        self._csr = None
+        self._version = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def publish(self):
+        """Share the current topology as CSR arrays, once per routing change"""
+        journal = self.simulator.journal
+        if not journal.changed_since(self._version, ROUTING_ATTRS, ()):
+            self._version = journal.version
+            return
+        self._release_graph()
+        self.nodes, *arrays = graph_to_csr(self.simulator.graph)
+        self._csr = [array.tolist() for array in arrays]
+        self._graph_shms = [_create_shared(array) for array in arrays]
+        self._graph_specs = [_spec(shm, array) for shm, array in zip(self._graph_shms, arrays)]
+        self._version = self.simulator.version
+
+    def shortest_paths(self, sources=None):
+        """RouteMatrix for the given sources (all routers by default)"""
+        self.publish()
+        sources = list(self.nodes) if sources is None else list(dict.fromkeys(sources))
+        index = {node: i for i, node in enumerate(self.nodes)}
+        source_ids = [index[source] for source in sources]
+        shape = (len(sources), len(self.nodes))
+
+        outputs = [np.full(shape, INF), np.full(shape, -1, dtype=np.int32), np.full(shape, -1, dtype=np.int32)]
+        out_shms = [_create_shared(array) for array in outputs]
+        out_specs = [_spec(shm, array) for shm, array in zip(out_shms, outputs)]
+        try:
+            chunks = [(source_ids[i:i + self.chunk_size], list(range(i, min(i + self.chunk_size, len(sources)))))
+                      for i in range(0, len(sources), self.chunk_size)]
+            if self.workers == 1 or len(chunks) == 1:
+                views = [_view(shm, spec) for shm, spec in zip(out_shms, out_specs)]
+                for chunk_sources, rows in chunks:
+                    _fill_rows(self._csr, views, chunk_sources, rows)
+                del views
+            else:
+                if self.pool is None:
+                    self.pool = ProcessPoolExecutor(max_workers=self.workers)
+                futures = [self.pool.submit(_solve_rows, self._graph_specs, out_specs, chunk_sources, rows)
+                           for chunk_sources, rows in chunks]
+                for future in futures:
+                    future.result()
+            results = [_view(shm, spec).copy() for shm, spec in zip(out_shms, out_specs)]
+        finally:
+            for shm in out_shms:
+                shm.close()
+                shm.unlink()
+        return RouteMatrix(self.nodes, sources, *results)
+
+    def route_batch(self, pairs):
+        """(path, cost) for each (start, end) pair, one SSSP per distinct start"""
+        pairs = list(pairs)
+        matrix = self.shortest_paths([start for start, _ in pairs])
+        return [matrix.path(start, end) for start, end in pairs]
+
+    def _release_graph(self):
+        for shm in self._graph_shms:
+            shm.close()
+            shm.unlink()
+        self._graph_shms = []
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        self._release_graph()
+        self._version = None
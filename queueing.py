@@ -0,0 +1,119 @@
+import numpy as np
+
+KB_BITS = 8 * 1024
+
+
+class LinkQueueModel:
+    """FIFO tail-drop queues for every link, held as parallel arrays
+
+    Rates are in bits per millisecond (bandwidth is in Mbps) and queue
+    sizes in bits, so every delay comes out in milliseconds. A link without
+    a positive bandwidth has a rate of zero: it tail-drops everything
+    offered to it and reports full congestion, the same way
+    TrafficEquilibrium saturates such a link under any load.
+    """
+
+    def __init__(self, buffer_kb=1024):
+        self.buffer_kb = buffer_kb
+        self.edges = []
+        self.index = {}
+        self.rate = np.empty(0)
+        self.buffer = np.empty(0)
+        self.backlog = np.empty(0)
+        self.dropped = np.empty(0, dtype=np.int64)
+        self.congestion = np.empty(0, dtype=np.int64)
+        self._version = -1
+        self._structure_version = -1
+
+    def sync(self, simulator):
+        """Follow topology changes, keeping the backlog of surviving links"""
+        graph = simulator.graph
+        if self._structure_version != simulator.structure_version:
+            old_index, old_backlog, old_dropped = self.index, self.backlog, self.dropped
+            self.edges = list(graph.edges)
+            self.index = {frozenset(edge): i for i, edge in enumerate(self.edges)}
+            self.rate = self._rates(graph, self.edges)
+            self.buffer = np.full(len(self.edges), self.buffer_kb * KB_BITS, dtype=float)
+            self.backlog = np.zeros(len(self.edges))
+            self.dropped = np.zeros(len(self.edges), dtype=np.int64)
+            self.congestion = np.array([graph[u][v]['congestion'] for u, v in self.edges], dtype=np.int64)
+            for key, i in self.index.items():
+                j = old_index.get(key)
+                if j is not None:
+                    self.backlog[i] = old_backlog[j]
+                    self.dropped[i] = old_dropped[j]
+            np.minimum(self.backlog, self.buffer, out=self.backlog)
+            self._structure_version = simulator.structure_version
+        elif self._version != simulator.version:
+            change = simulator.journal.since(self._version)
+            if change is None:
+                self.rate = self._rates(graph, self.edges)
+            else:
+                # Congestion written back by this model never touches the rates
+                for u, v in change.changed_links({'bandwidth'}):
+                    i = self.index.get(frozenset((u, v)))
+                    if i is not None:
+                        self.rate[i] = self._rates(graph, [(u, v)])[0]
+        self._version = simulator.version
+
+    @staticmethod
+    def _rates(graph, edges):
+        rates = np.array([graph[u][v]['bandwidth'] for u, v in edges], dtype=float) * 1e3
+        rates[~(rates > 0)] = 0.0
+        return rates
+
+    def step(self, dt_ms, arrivals=None):
+        """Advance every queue by dt_ms: tail-drop arrivals (bits), then drain"""
+        if arrivals is not None:
+            accepted = np.minimum(arrivals, self.buffer - self.backlog)
+            accepted[self.rate <= 0] = 0
+            self.backlog += accepted
+        self.backlog = np.maximum(0.0, self.backlog - self.rate * dt_ms)
+
+    def send(self, hops, latencies, num_packets, packet_size_kb):
+        """Push a burst along a path of link indices and return its delays"""
+        size = packet_size_kb * KB_BITS
+        remaining = num_packets
+        propagation = queueing = serialization = 0.0
+        hop_delays = []
+        for i, latency in zip(hops, latencies):
+            if self.rate[i] <= 0:
+                # No bandwidth: the whole burst is dropped here
+                self.dropped[i] += remaining
+                remaining = 0
+                propagation += latency
+                hop_delays.append(latency)
+                continue
+            # FIFO: wait behind the current backlog; tail-drop what doesn't fit
+            wait = float(self.backlog[i] / self.rate[i])
+            accepted = min(remaining, int((self.buffer[i] - self.backlog[i]) // size))
+            self.dropped[i] += remaining - accepted
+            remaining = accepted
+            self.backlog[i] += accepted * size
+            transmit = float(max(accepted, 1) * size / self.rate[i])
+            propagation += latency
+            queueing += wait
+            serialization += transmit
+            hop_delays.append(latency + wait + transmit)
+        return {
+            'propagation_delay': propagation,
+            'queueing_delay': queueing,
+            'serialization_delay': serialization,
+            'total_latency': propagation + queueing + serialization,
+            'delivered': remaining,
+            'dropped': num_packets - remaining,
+            'hop_delays': hop_delays
+        }
+
+    def copy(self):
+        """Independent copy of the queue state, for snapshots"""
+        clone = LinkQueueModel(self.buffer_kb)
+        clone.__dict__.update(self.__dict__)
+        clone.index = dict(self.index)
+        for name in ('rate', 'buffer', 'backlog', 'dropped', 'congestion'):
+            setattr(clone, name, getattr(self, name).copy())
+        return clone
+
+    def occupancy(self):
+        """Queue fill per link, in percent; 100 on links without bandwidth"""
+        return np.where(self.rate > 0, 100 * self.backlog / self.buffer, 100.0)
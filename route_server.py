@@ -0,0 +1,492 @@
+"""Local HTTP route-query service
+
+Serves shortest-path answers from a NetworkSimulator over HTTP/1.1 with
+keep-alive. Queries arriving within a short window are merged into one
+batch, solved with one shortest-path tree per distinct source, and batch
+results stream back as JSON lines.
+
+    python route_server.py [--port 8765] [--topology net.csv | --routers 50]
+    python route_server.py --bench 20000
+
+    GET  /route?source=R1&target=R7   {"source", "target", "path", "cost"}
+    GET  /cost?source=R1&target=R7    {"source", "target", "cost"}
+    POST /routes                      pairs as a JSON array or JSON lines, answered as JSON lines
+    GET  /topology                    version, router and link counts
+    POST /topology                    {"routers", "links", "updates", "remove_links"} in one transaction
+    GET  /stats                       queries, batches and mean batch size
+"""
+import argparse
+import http.client
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from network_core import NetworkSimulator, LINK_ATTRS
+
+STREAM_CHUNK = 1024
+
+
+def _json_default(value):
+    # NumPy scalars from imported topologies
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def _dumps(obj):
+    return json.dumps(obj, default=_json_default, separators=(',', ':'))
+
+
+def _route(source, target, distances, previous):
+    if target not in distances:
+        return {'source': source, 'target': target, 'path': [], 'cost': None}
+    path = [target]
+    while path[-1] != source:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return {'source': source, 'target': target, 'path': path, 'cost': distances[target]}
+
+
+def _router(value, where):
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise ValueError(f"{where}: router names must be strings or integers, got {value!r}")
+    return value
+
+
+def parse_pairs(body):
+    """(source, target) pairs from a JSON array or JSON lines of [s, t] or {"source", "target"}"""
+    text = body.decode() if isinstance(body, bytes) else body
+    text = text.strip()
+    if not text:
+        return []
+    try:
+        items = json.loads(text)
+    except ValueError:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not isinstance(items, list) or (items and not isinstance(items[0], (list, dict))):
+        # A single line holds one pair
+        items = [items]
+    pairs = []
+    for i, item in enumerate(items):
+        where = f"pair {i}"
+        if isinstance(item, dict):
+            if 'source' not in item or 'target' not in item:
+                raise ValueError(f"{where}: source and target are required")
+            source, target = item['source'], item['target']
+        elif isinstance(item, list) and len(item) == 2:
+            source, target = item
+        else:
+            raise ValueError(f"{where}: expected [source, target] or {{\"source\", \"target\"}}, got {item!r}")
+        pairs.append((_router(source, where), _router(target, where)))
+    return pairs
+
+
+class RouteBatcher:
+    """Merges route queries arriving within window seconds into one computation
+
+    One worker thread owns all query work: it takes the first waiting
+    request, keeps collecting until the window closes or max_batch pairs
+    are queued, then answers them all under the simulator lock with one
+    shortest-path tree per distinct source.
+    """
+
+    def __init__(self, simulator, lock, window=0.001, max_batch=8192):
+        self.simulator = simulator
+        self.lock = lock
+        self.window = window
+        self.max_batch = max_batch
+        self.queries = 0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='route-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, pairs):
+        """Future resolving to one result dict per (source, target) pair"""
+        future = Future()
+        self._queue.put((list(pairs), future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs, size = [job], len(job[0])
+            deadline = time.monotonic() + self.window
+            while size < self.max_batch:
+                try:
+                    job = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._queue.put(None)
+                    break
+                jobs.append(job)
+                size += len(job[0])
+
+            pairs = [pair for job_pairs, _ in jobs for pair in job_pairs]
+            try:
+                with self.lock:
+                    results = self.solve(pairs)
+            except Exception as e:
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+            self.queries += len(pairs)
+            self.batches += 1
+            start = 0
+            for job_pairs, future in jobs:
+                future.set_result(results[start:start + len(job_pairs)])
+                start += len(job_pairs)
+
+    def solve(self, pairs):
+        """Answer pairs with one shortest-path tree per distinct source (or through areas, if enabled)"""
+        by_source = {}
+        results = [None] * len(pairs)
+        for i, (source, target) in enumerate(pairs):
+            try:
+                by_source.setdefault(source, []).append(i)
+            except TypeError:
+                results[i] = {'source': source, 'target': target, 'path': [], 'cost': None,
+                              'error': f"invalid router name {source!r}"}
+        for source, rows in by_source.items():
+            try:
+                self._solve_source(source, rows, pairs, results)
+            except Exception as e:
+                # One bad query must not fail the other requests merged into this batch
+                for i in rows:
+                    results[i] = {'source': source, 'target': pairs[i][1], 'path': [], 'cost': None,
+                                  'error': f"{type(e).__name__}: {e}"}
+        return results
+
+    def _solve_source(self, source, rows, pairs, results):
+        sim = self.simulator
+        if source not in sim.graph:
+            for i in rows:
+                results[i] = {'source': source, 'target': pairs[i][1], 'path': [], 'cost': None,
+                              'error': f"unknown router {source}"}
+            return
+        if sim.areas is not None:
+            for i in rows:
+                path, cost = sim.areas.route(source, pairs[i][1])
+                results[i] = {'source': source, 'target': pairs[i][1], 'path': path,
+                              'cost': cost if path else None}
+            return
+        distances, previous = sim.shortest_paths(source)
+        for i in rows:
+            results[i] = _route(source, pairs[i][1], distances, previous)
+
+
+def _endpoints(link, where):
+    if not isinstance(link, dict):
+        raise ValueError(f"{where}: expected an object with source and target, got {link!r}")
+    if 'source' not in link or 'target' not in link:
+        raise ValueError(f"{where}: source and target are required")
+    return _router(link['source'], where), _router(link['target'], where)
+
+
+def _link_value(attr, value, where):
+    if attr == 'status':
+        if value not in ('active', 'failed'):
+            raise ValueError(f"{where}: status must be 'active' or 'failed', got {value!r}")
+    elif isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"{where}: {attr} must be a non-negative number, got {value!r}")
+    return value
+
+
+def parse_update(simulator, update):
+    """Check a whole topology update document before any of it is applied
+
+    Returns (routers, links, columns, removals) ready for the simulator's
+    bulk methods; raises ValueError naming the first problem found.
+    """
+    if not isinstance(update, dict):
+        raise ValueError("The update must be a JSON object")
+    unknown = set(update) - {'routers', 'links', 'updates', 'remove_links'}
+    if unknown:
+        raise ValueError(f"Unknown update keys: {', '.join(sorted(unknown))}")
+    for key in ('routers', 'links', 'updates', 'remove_links'):
+        if not isinstance(update.get(key, []), list):
+            raise ValueError(f"{key} must be a list")
+
+    routers = [_router(router, f"routers[{i}]") for i, router in enumerate(update.get('routers', []))]
+    known = set(routers)
+
+    links = []
+    for i, link in enumerate(update.get('links', [])):
+        where = f"links[{i}]"
+        source, target = _endpoints(link, where)
+        extra = set(link) - {'source', 'target', 'latency', 'bandwidth'}
+        if extra:
+            raise ValueError(f"{where}: unknown keys {', '.join(sorted(extra))}")
+        if source == target:
+            raise ValueError(f"{where}: a link needs two different routers")
+        for router in (source, target):
+            if router not in known and router not in simulator.graph:
+                raise ValueError(f"{where}: unknown router {router}")
+        links.append((source, target, _link_value('latency', link.get('latency', 10), where),
+                      _link_value('bandwidth', link.get('bandwidth', 100), where)))
+
+    columns = {}
+    for i, link in enumerate(update.get('updates', [])):
+        where = f"updates[{i}]"
+        edge = _endpoints(link, where)
+        for attr, value in link.items():
+            if attr in ('source', 'target'):
+                continue
+            if attr not in LINK_ATTRS:
+                raise ValueError(f"{where}: unknown link attribute {attr}")
+            edges, values = columns.setdefault(attr, ([], []))
+            edges.append(edge)
+            values.append(_link_value(attr, value, where))
+
+    removals = []
+    for i, edge in enumerate(update.get('remove_links', [])):
+        where = f"remove_links[{i}]"
+        if not isinstance(edge, list) or len(edge) != 2:
+            raise ValueError(f"{where}: expected [source, target]")
+        removals.append((_router(edge[0], where), _router(edge[1], where)))
+    return routers, links, columns, removals
+
+
+def apply_update(simulator, update):
+    """Apply a topology update document in one transaction, all or nothing
+
+    The whole document is checked first, so a ValueError leaves the
+    simulator untouched.
+    """
+    routers, links, columns, removals = parse_update(simulator, update)
+    with simulator.batch():
+        simulator.add_routers(routers)
+        if links:
+            sources, targets, latencies, bandwidths = zip(*links)
+            simulator.add_links(list(sources), list(targets), latencies=list(latencies),
+                                bandwidths=list(bandwidths))
+        for attr, (edges, values) in columns.items():
+            simulator.update_links(edges, **{attr: values})
+        simulator.remove_links(removals)
+
+
+class RouteRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; don't let them wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, obj, status=200):
+        body = (_dumps(obj) + '\n').encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send_json({'error': message}, status)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _pair(self, query):
+        try:
+            return query['source'][0], query['target'][0]
+        except KeyError:
+            return None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        server = self.server
+        if url.path in ('/route', '/cost'):
+            pair = self._pair(query)
+            if pair is None:
+                return self._error(400, "source and target are required")
+            result = server.batcher.submit([pair]).result()[0]
+            if url.path == '/cost':
+                result = {key: result[key] for key in ('source', 'target', 'cost', 'error') if key in result}
+            self._send_json(result)
+        elif url.path == '/topology':
+            with server.lock:
+                sim = server.simulator
+                self._send_json({'version': sim.version, 'routers': sim.graph.number_of_nodes(),
+                                 'links': sim.graph.number_of_edges(), 'components': sim.connectivity.count})
+        elif url.path == '/stats':
+            batcher = server.batcher
+            self._send_json({'queries': batcher.queries, 'batches': batcher.batches,
+                             'mean_batch': batcher.queries / batcher.batches if batcher.batches else 0})
+        else:
+            self._error(404, f"Unknown endpoint {url.path}")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        server = self.server
+        try:
+            body = self._body()
+            if url.path == '/routes':
+                pairs = parse_pairs(body)
+            elif url.path == '/topology':
+                update = json.loads(body or b'{}')
+            else:
+                return self._error(404, f"Unknown endpoint {url.path}")
+        except (ValueError, KeyError, TypeError) as e:
+            return self._error(400, f"Malformed request: {e}")
+
+        if url.path == '/topology':
+            try:
+                with server.lock:
+                    apply_update(server.simulator, update)
+                    sim = server.simulator
+                    result = {'version': sim.version, 'routers': sim.graph.number_of_nodes(),
+                              'links': sim.graph.number_of_edges()}
+            except (ValueError, KeyError, TypeError) as e:
+                return self._error(400, f"Bad update: {e}")
+            return self._send_json(result)
+
+        # Queue every chunk at once so they batch together, then stream them back in order
+        futures = [server.batcher.submit(pairs[i:i + STREAM_CHUNK]) for i in range(0, len(pairs), STREAM_CHUNK)]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for future in futures:
+            data = ''.join(_dumps(result) + '\n' for result in future.result()).encode()
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.write(b'0\r\n\r\n')
+
+
+class RouteServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one simulator, lock and batcher"""
+
+    daemon_threads = True
+
+    def __init__(self, simulator, host='127.0.0.1', port=8765, window=0.001, verbose=False):
+        super().__init__((host, port), RouteRequestHandler)
+        self.simulator = simulator
+        self.lock = threading.RLock()
+        self.batcher = RouteBatcher(simulator, self.lock, window)
+        self.verbose = verbose
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+
+
+class RouteClient:
+    """Keep-alive client for a RouteServer"""
+
+    def __init__(self, host='127.0.0.1', port=8765, timeout=30):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{method} {path}: {response.status} {data.decode().strip()}")
+        return data
+
+    def route(self, source, target):
+        from urllib.parse import urlencode
+        return json.loads(self._request('GET', '/route?' + urlencode({'source': source, 'target': target})))
+
+    def routes(self, pairs):
+        body = '\n'.join(_dumps(list(pair)) for pair in pairs)
+        return [json.loads(line) for line in self._request('POST', '/routes', body).splitlines()]
+
+    def update(self, **update):
+        return json.loads(self._request('POST', '/topology', _dumps(update)))
+
+    def close(self):
+        self.connection.close()
+
+
+def bench(server, queries, clients=8):
+    """Queries per second for single GET /route requests and one streamed batch"""
+    host, port = server.server_address[:2]
+    routers = list(server.simulator.graph.nodes)
+    pairs = [(routers[i % len(routers)], routers[(i * 7 + 3) % len(routers)]) for i in range(queries)]
+
+    def worker(chunk):
+        client = RouteClient(host, port)
+        for source, target in chunk:
+            client.route(source, target)
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(pairs[i::clients],)) for i in range(clients)]
+    batches = server.batcher.batches
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    single = queries / (time.perf_counter() - start)
+    batches = server.batcher.batches - batches
+
+    client = RouteClient(host, port)
+    start = time.perf_counter()
+    client.routes(pairs)
+    streamed = queries / (time.perf_counter() - start)
+    client.close()
+    return single, streamed, batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--topology', help="CSV, GraphML or GML file to load")
+    parser.add_argument('--routers', type=int, default=50, help="random network size if no topology is given")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--areas', nargs='?', const='', metavar='ATTR',
+                        help="route through areas from a router attribute (partitioned automatically if omitted)")
+    parser.add_argument('--window', type=float, default=1.0, help="batching window in milliseconds")
+    parser.add_argument('--bench', type=int, metavar='QUERIES', help="serve on a free port, benchmark and exit")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    simulator = NetworkSimulator(seed=args.seed)
+    if args.topology:
+        from topology_import import import_topology
+        import_topology(simulator, args.topology)
+    else:
+        simulator.generate_random_network(args.routers)
+    if args.areas is not None:
+        simulator.set_areas(True, args.areas or None)
+
+    port = 0 if args.bench else args.port
+    server = RouteServer(simulator, args.host, port, args.window / 1000, args.verbose)
+    if args.bench:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        single, streamed, batches = bench(server, args.bench)
+        print(f"GET /route (8 keep-alive clients): {single:,.0f} queries/s in {batches} batches")
+        print(f"POST /routes (streamed):          {streamed:,.0f} queries/s")
+        server.shutdown()
+        server.server_close()
+        return 0
+
+    host, port = server.server_address[:2]
+    print(f"Serving {simulator.graph.number_of_nodes()} routers on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import math
+
+import numpy as np
+
+
+class SpatialIndex:
+    """Uniform grid over 2-D points for viewport, nearest-point and label-thinning queries
+
+    Points are bucketed into square cells (about one point per cell by
+    default) and stored sorted by cell, so every row of cells in a query
+    rectangle is one contiguous slice found by binary search.
+    """
+
+    MAX_RINGS = 8
+
+    def __init__(self, points, cell_size=None):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        n = len(self.points)
+        self.lo = self.points.min(axis=0) if n else np.zeros(2)
+        self.hi = self.points.max(axis=0) if n else np.zeros(2)
+        extent = float((self.hi - self.lo).max())
+        self.cell_size = cell_size or (extent / max(1.0, math.sqrt(n)) if extent > 0 else 1.0)
+
+        cells = self._cells(self.points)
+        self.shape = (cells.max(axis=0) + 1) if n else np.ones(2, dtype=np.int64)
+        keys = cells[:, 0] * self.shape[1] + cells[:, 1]
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cells(self, points):
+        return np.floor((points - self.lo) / self.cell_size).astype(np.int64)
+
+    def _block(self, x0, y0, x1, y1):
+        """Indices of the points in cells x0..x1, y0..y1 (clipped to the grid)"""
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.shape[0] - 1), min(y1, self.shape[1] - 1)
+        if x0 > x1 or y0 > y1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(x0, x1 + 1) * self.shape[1]
+        starts = np.searchsorted(self.keys, rows + y0)
+        ends = np.searchsorted(self.keys, rows + y1, side='right')
+        if not len(starts):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[s:e] for s, e in zip(starts, ends)])
+
+    def within(self, xmin, ymin, xmax, ymax):
+        """Indices of the points inside a rectangle"""
+        (x0, y0), (x1, y1) = self._cells(np.array([[xmin, ymin], [xmax, ymax]]))
+        candidates = self._block(x0, y0, x1, y1)
+        p = self.points[candidates]
+        inside = (p[:, 0] >= xmin) & (p[:, 0] <= xmax) & (p[:, 1] >= ymin) & (p[:, 1] <= ymax)
+        return candidates[inside]
+
+    def nearest(self, x, y, max_distance=math.inf):
+        """Index of the point closest to (x, y), or None if none is within max_distance"""
+        if not len(self.points):
+            return None
+        cx, cy = self._cells(np.array([[x, y]]))[0]
+        best, best_distance = None, max_distance
+        radius = 0
+        while True:
+            if radius > self.MAX_RINGS or not (0 <= cx < self.shape[0] and 0 <= cy < self.shape[1]):
+                # Off the grid or in an empty stretch of it, one vectorized scan beats more rings
+                distances = np.hypot(self.points[:, 0] - x, self.points[:, 1] - y)
+                i = int(distances.argmin())
+                return i if distances[i] <= max_distance else None
+            # Only the ring of cells at this radius is new
+            ring = self._block(cx - radius, cy - radius, cx + radius, cy + radius)
+            if radius and len(ring):
+                inner = self._block(cx - radius + 1, cy - radius + 1, cx + radius - 1, cy + radius - 1)
+                ring = np.setdiff1d(ring, inner, assume_unique=True)
+            if len(ring):
+                distances = np.hypot(self.points[ring, 0] - x, self.points[ring, 1] - y)
+                i = int(distances.argmin())
+                if distances[i] <= best_distance:
+                    best, best_distance = int(ring[i]), float(distances[i])
+            # Anything beyond this ring is at least radius cells away
+            covered = cx - radius <= 0 and cy - radius <= 0 and \
+                cx + radius >= self.shape[0] - 1 and cy + radius >= self.shape[1] - 1
+            if covered or radius * self.cell_size >= best_distance:
+                return best
+            radius += 1
+
+    def thin(self, spacing, candidates=None, priority=None):
+        """Greedy subset of points at least spacing apart, highest priority first
+
+        Used for labels: spacing is the label footprint in data units, so
+        zooming in (a smaller spacing) lets more labels through.
+        """
+        candidates = np.arange(len(self.points)) if candidates is None else np.asarray(candidates)
+        if not len(candidates) or spacing <= 0:
+            return candidates
+        if priority is not None:
+            candidates = candidates[np.argsort(-np.asarray(priority, dtype=float)[candidates], kind='stable')]
+
+        # At most one label can win each spacing-sized cell; keep the best per cell first
+        cells = np.floor((self.points[candidates] - self.lo) / spacing).astype(np.int64)
+        _, first = np.unique(cells, axis=0, return_index=True)
+        first.sort()
+        candidates, cells = candidates[first], cells[first]
+
+        taken = {}
+        accepted = []
+        for index, (gx, gy) in zip(candidates.tolist(), cells.tolist()):
+            x, y = self.points[index]
+            clash = False
+            for ox in (gx - 1, gx, gx + 1):
+                for oy in (gy - 1, gy, gy + 1):
+                    other = taken.get((ox, oy))
+                    if other is not None and math.hypot(x - other[0], y - other[1]) < spacing:
+                        clash = True
+                        break
+                if clash:
+                    break
+            if not clash:
+                taken[(gx, gy)] = (x, y)
+                accepted.append(index)
+        return np.array(accepted, dtype=np.int64)
@@ -0,0 +1,79 @@
+def _router_row(graph, node):
+    return {
+        'Router': node,
+        'Status': graph.nodes[node]['status'],
+        'Connections': graph.degree(node)
+    }
+
+
+def _link_row(u, v, data):
+    return {
+        'Link': f"{u} ↔ {v}",
+        'Latency': f"{data['latency']}ms",
+        'Bandwidth': f"{data['bandwidth']}Mbps",
+        'Congestion': f"{data['congestion']}%",
+        'Packet Loss': f"{data['packet_loss']}%",
+        'Status': data['status']
+    }
+
+
+class StatusTables:
+    """Router and link tables cached per topology version"""
+
+    def __init__(self):
+        self.owner = None
+        self.version = -1
+        self.structure_version = -1
+        self.routers = None
+        self.links = None
+        self._link_rows = {}
+        self._router_rows = {}
+
+    def refresh(self, simulator):
+        """Bring the tables up to the simulator's current version"""
+        if self.owner is not simulator or self.structure_version != simulator.structure_version:
+            self._rebuild(simulator)
+        elif self.version != simulator.version:
+            change = simulator.journal.since(self.version)
+            # Large change sets are cheaper to rebuild than to patch row by row
+            if change is None or change.structural or len(change.edges) > max(64, len(self.links) // 4):
+                self._rebuild(simulator)
+            else:
+                self._update_links(simulator, change.changed_links())
+                self._update_routers(simulator, change.changed_routers({'status'}))
+        self.version = simulator.version
+        return self.routers, self.links
+
+    def _rebuild(self, simulator):
+        import pandas as pd
+
+        graph = simulator.graph
+        self.owner = simulator
+        self.structure_version = simulator.structure_version
+        self.routers = pd.DataFrame([_router_row(graph, node) for node in graph.nodes],
+                                    columns=['Router', 'Status', 'Connections'])
+        self._router_rows = {node: i for i, node in enumerate(graph.nodes)}
+
+        rows = []
+        self._link_rows = {}
+        for u, v, data in graph.edges(data=True):
+            self._link_rows[frozenset((u, v))] = (len(rows), u, v)
+            rows.append(_link_row(u, v, data))
+        self.links = pd.DataFrame(rows, columns=['Link', 'Latency', 'Bandwidth',
+                                                 'Congestion', 'Packet Loss', 'Status'])
+
+    def _update_links(self, simulator, changed):
+        graph = simulator.graph
+        for link in changed:
+            entry = self._link_rows.get(frozenset(link))
+            if entry is None or not graph.has_edge(*link):
+                continue
+            row, u, v = entry
+            self.links.iloc[row] = list(_link_row(u, v, graph[u][v]).values())
+
+    def _update_routers(self, simulator, changed):
+        graph = simulator.graph
+        for node in changed:
+            row = self._router_rows.get(node)
+            if row is not None and node in graph:
+                self.routers.iloc[row] = list(_router_row(graph, node).values())
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network_core import NetworkSimulator  # noqa: E402
+
+
+@pytest.fixture
+def network():
+    """R1 —10ms— R2 —20ms— R3, all links 100 Mbps"""
+    sim = NetworkSimulator(seed=1)
+    sim.add_routers(['R1', 'R2', 'R3'])
+    sim.add_links(['R1', 'R2'], ['R2', 'R3'], latencies=[10, 20])
+    return sim
@@ -0,0 +1,30 @@
+from network_core import NetworkSimulator
+from topology_store import SharedTopology
+
+
+def test_bulk_update_on_shared_topology_stays_in_session(network):
+    shared = SharedTopology('base', network.graph)
+    session_a, session_b = NetworkSimulator(), NetworkSimulator()
+    session_a.attach(shared)
+    session_b.attach(shared)
+
+    session_b.update_links([('R1', 'R2'), ('R2', 'R3')], status='failed', latency=[5, 6])
+
+    assert session_b.graph['R1']['R2']['status'] == 'failed'
+    assert session_b.graph['R2']['R3']['latency'] == 6
+    assert shared.graph['R1']['R2']['status'] == 'active'
+    assert shared.graph['R2']['R3']['latency'] == 20
+    assert session_a.graph['R1']['R2']['status'] == 'active'
+
+
+def test_bulk_update_after_snapshot_leaves_snapshot_intact(network):
+    sim = network
+    snapshot = sim.snapshot()
+
+    sim.update_links([('R1', 'R2')], congestion=80, status='failed')
+
+    assert sim.graph['R1']['R2']['congestion'] == 80
+    assert snapshot.topology.graph['R1']['R2']['congestion'] == 0
+    sim.restore(snapshot)
+    assert sim.graph['R1']['R2']['status'] == 'active'
+    assert sim.graph['R1']['R2']['congestion'] == 0
@@ -0,0 +1,48 @@
+import pytest
+
+from network_core import NetworkSimulator
+from fast_reroute import FastReroute, REMOTE_LFA
+
+
+@pytest.fixture
+def ring():
+    """R1..R6 in a ring of 1 ms links: no LFA exists, only remote LFAs"""
+    sim = NetworkSimulator(seed=1)
+    routers = [f'R{i}' for i in range(1, 7)]
+    sim.add_routers(routers)
+    sim.add_links(routers, routers[1:] + routers[:1], latencies=1)
+    return sim
+
+
+def test_ring_repairs_through_pq_node(ring):
+    frr = FastReroute(ring)
+    frr.compute()
+
+    assert frr.protection('R1', 'R2') == (REMOTE_LFA, 'R6', 'R4')
+    path, kind = frr.repair_path('R1', 'R2', ('R1', 'R2'))
+    assert kind == REMOTE_LFA
+    assert path == ['R1', 'R6', 'R5', 'R4', 'R3', 'R2']
+
+
+def test_every_repair_avoids_the_failed_link():
+    sim = NetworkSimulator(seed=3)
+    sim.generate_random_network(60)
+    frr = FastReroute(sim)
+    frr.compute()
+
+    for router in frr.nodes:
+        for destination in frr.nodes:
+            kind, hop, _ = frr.protection(router, destination)
+            if kind is None:
+                continue
+            failed = (router, frr.nodes[frr.primary[frr.index[router], frr.index[destination]]])
+            path, kind = frr.repair_path(router, destination, failed)
+            assert kind is not None and path[-1] == destination
+            assert all({u, v} != set(failed) for u, v in zip(path, path[1:]))
+
+
+def test_compute_leaves_the_route_cache_alone(network):
+    network.dijkstra('R1', 'R3')
+    cached = list(network.route_cache.trees)
+    FastReroute(network).compute()
+    assert list(network.route_cache.trees) == cached
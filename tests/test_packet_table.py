@@ -0,0 +1,56 @@
+import numpy as np
+
+from packet_table import PacketTable
+from visualization import NetworkVisualizer
+
+
+def _deliver(sim):
+    while sim.animating or len(sim.packets):
+        sim.animate_packet()
+
+
+def test_redraw_after_removing_a_router_from_an_old_path(network):
+    network.simulate_packet('R1', 'R3')
+    _deliver(network)
+    network.remove_router('R3')
+
+    visualizer = NetworkVisualizer()
+    fig, ax = visualizer.get_figure()
+    visualizer.draw_network(network, fig, ax)
+
+
+def test_redraw_after_regenerating_a_smaller_network(network):
+    network.generate_random_network(12)
+    network.simulate_packet('R1', 'R12')
+    network.animate_packet()
+    network.generate_random_network(5)
+    network.simulate_packet('R1', 'R5')
+
+    visualizer = NetworkVisualizer()
+    fig, ax = visualizer.get_figure()
+    visualizer.draw_network(network, fig, ax)
+    assert all('R12' not in path for path in network.packets.paths)
+
+
+def test_packets_on_a_removed_router_are_not_placed():
+    table = PacketTable()
+    table.launch(['A', 'B', 'C'])
+    table.step(1.5)
+    xy, valid = table.interpolate({'A': (0, 0), 'B': (1, 0)})
+    assert not valid.any()
+    assert xy.shape == (1, 1, 2)
+
+
+def test_interned_paths_stay_bounded():
+    table = PacketTable()
+    for i in range(200):
+        table.launch(['A', f'R{i}'])
+        table.step(1.0)
+    assert len(table) == 0
+    assert len(table.paths) <= 16 + 1
+    table.launch(['A', 'B'])
+    table.step(0.5)
+    xy, valid = table.interpolate({'A': (0.0, 0.0), 'B': (2.0, 0.0)})
+    assert valid.all() and np.allclose(xy[0, 0], (1.0, 0.0))
+    table.clear()
+    assert table.paths == [] and len(table.path_hops) == 0
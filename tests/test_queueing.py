@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def queued(network):
+    network.set_queueing(True, buffer_kb=64)
+    return network
+
+
+def test_zero_bandwidth_link_drops_everything(queued):
+    sim = queued
+    sim.update_link('R2', 'R3', bandwidth=0)
+    sim.simulate_packet('R1', 'R3', num_packets=5, packet_size=8)
+    model = sim.queue_model
+    zero = model.index[frozenset(('R2', 'R3'))]
+
+    assert model.rate[zero] == 0
+    assert model.dropped[zero] == 5
+    assert model.backlog[zero] == 0
+    assert np.isfinite(model.occupancy()).all()
+    assert model.occupancy()[zero] == 100
+    assert sim.graph['R2']['R3']['congestion'] == 100
+    assert math.isfinite(sim.packet_stats['total_latency'])
+
+    delays = model.send([zero], [20], 3, 8)
+    assert delays['hop_delays'] == [20]
+    assert delays['delivered'] == 0
+    assert delays['dropped'] == 3
+
+
+def test_zero_bandwidth_agrees_with_equilibrium(network):
+    from traffic_equilibrium import TrafficEquilibrium
+
+    network.update_link('R2', 'R3', bandwidth=0)
+    result = TrafficEquilibrium(network).solve({('R1', 'R3'): 10})
+    result.apply(network)
+    assert network.graph['R2']['R3']['congestion'] == 100
+
+
+def test_bandwidth_dropping_to_zero_and_back(queued):
+    sim = queued
+    sim.simulate_packet('R1', 'R3')
+    sim.update_link('R2', 'R3', bandwidth=0)
+    sim.advance_clock(1)
+    sim.simulate_packet('R1', 'R3')
+    sim.advance_clock(0)
+
+    model = sim.queue_model
+    zero = model.index[frozenset(('R2', 'R3'))]
+    assert model.rate[zero] == 0
+    assert np.isfinite(model.backlog).all()
+
+    sim.update_link('R2', 'R3', bandwidth=10)
+    model.sync(sim)
+    assert model.rate[zero] == 10e3
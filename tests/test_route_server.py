@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from route_server import RouteServer, RouteClient, apply_update
+
+
+@pytest.mark.parametrize('update', [
+    {'routers': ['R4', 'R5'], 'links': [{'source': 'R4', 'target': 'R9'}]},
+    {'routers': ['R4'], 'updates': [{'source': 'R1', 'target': 'R2', 'colour': 'red'}]},
+    {'routers': ['R4'], 'updates': [{'source': 'R1', 'target': 'R2', 'latency': 'fast'}]},
+    {'links': [{'source': 'R1', 'target': 'R3'}], 'remove_links': [['R1']]},
+    {'routers': ['R4', {'name': 'R5'}]},
+])
+def test_bad_update_changes_nothing(network, update):
+    sim = network
+    version = sim.version
+    with pytest.raises(ValueError):
+        apply_update(sim, update)
+    assert sim.version == version
+    assert sorted(sim.graph.nodes) == ['R1', 'R2', 'R3']
+    assert sim.graph.number_of_edges() == 2
+    assert sim.graph['R1']['R2']['latency'] == 10
+
+
+def test_topology_post_is_all_or_nothing(network):
+    sim = network
+    server = RouteServer(sim, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = RouteClient(*server.server_address[:2])
+    try:
+        with pytest.raises(RuntimeError, match='400'):
+            client.update(routers=['R4', 'R5'], links=[{'source': 'R4', 'target': 'nowhere'}])
+        assert sim.graph.number_of_nodes() == 3
+
+        result = client.update(routers=['R4'], links=[{'source': 'R3', 'target': 'R4', 'latency': 5}],
+                               updates=[{'source': 'R1', 'target': 'R2', 'status': 'failed'}])
+        assert (result['routers'], result['links']) == (4, 3)
+        assert client.route('R2', 'R4')['cost'] == 25
+        assert client.route('R1', 'R4')['cost'] is None
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize('body', ['[["x"], "R1"]', '[[["x"], "R1"]]', '{"source": "R1"}', '7', '[true, "R1"]'])
+def test_malformed_pairs_are_rejected_before_queueing(network, body):
+    server = RouteServer(network, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = RouteClient(*server.server_address[:2])
+    try:
+        with pytest.raises(RuntimeError, match='400'):
+            client._request('POST', '/routes', body)
+        assert server.batcher.queries == 0
+        assert client.route('R1', 'R3')['cost'] == 30
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_bad_query_does_not_fail_its_batch(network):
+    server = RouteServer(network, port=0, window=0.05)
+    try:
+        bad = server.batcher.submit([(['x'], 'R1'), ('R1', 'R2')])
+        good = server.batcher.submit([('R1', 'R3')])
+        bad_rows, good_rows = bad.result(timeout=5), good.result(timeout=5)
+        assert server.batcher.batches == 1
+        assert 'error' in bad_rows[0]
+        assert bad_rows[1]['cost'] == 10
+        assert good_rows == [{'source': 'R1', 'target': 'R3', 'path': ['R1', 'R2', 'R3'], 'cost': 30}]
+    finally:
+        server.server_close()
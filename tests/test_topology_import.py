@@ -0,0 +1,31 @@
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from topology_import import import_topology
+
+GRAPHML = b"""<?xml version="1.0"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <graph edgedefault="undirected">
+    <node id="A"/><node id="B"/><node id="C"/>
+    <edge source="A" target="B"/>
+    <edge source="B" target="C"/>
+"""
+
+
+def test_import_streams_into_the_network(network):
+    source = io.BytesIO(GRAPHML + b"  </graph>\n</graphml>\n")
+    assert import_topology(network, source, fmt='graphml', chunk_size=1) == (3, 2)
+    assert sorted(network.graph.nodes) == ['A', 'B', 'C']
+
+
+@pytest.mark.parametrize('replace', [True, False])
+def test_malformed_file_rolls_back_after_partial_load(network, replace):
+    # Truncated: the first links are applied before the parser fails
+    with pytest.raises(ET.ParseError):
+        import_topology(network, io.BytesIO(GRAPHML), fmt='graphml', chunk_size=1, replace=replace)
+
+    assert sorted(network.graph.nodes) == ['R1', 'R2', 'R3']
+    assert network.graph.number_of_edges() == 2
+    assert network.dijkstra('R1', 'R3') == (['R1', 'R2', 'R3'], 30)
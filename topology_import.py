@@ -0,0 +1,254 @@
+import csv
+import io
+import math
+import os
+import re
+import xml.etree.ElementTree as ET
+
+LINK_COLUMNS = ('latency', 'bandwidth', 'status', 'congestion', 'packet_loss')
+SOURCE_NAMES = ('source', 'router1', 'src', 'from', 'u')
+TARGET_NAMES = ('target', 'router2', 'dst', 'to', 'v')
+
+# Light in fiber covers about 200 km per millisecond
+FIBER_KM_PER_MS = 200.0
+
+
+def _number(value):
+    """Parse '10' as 10 and '2.5' as 2.5; leave other strings alone"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else number
+
+
+def _text_stream(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, newline='', encoding='utf-8')
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding='utf-8', newline='')
+
+
+def _binary_stream(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    return source
+
+
+class _Chunker:
+    """Accumulates links column-wise and hands them out in fixed-size chunks"""
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.routers = []
+        self._reset()
+
+    def _reset(self):
+        self.links = {'source': [], 'target': []}
+        self.size = 0
+
+    def add_link(self, source, target, attrs):
+        for name in LINK_COLUMNS:
+            if name in attrs and name not in self.links:
+                self.links[name] = [None] * self.size
+        for name, column in self.links.items():
+            if name == 'source':
+                column.append(source)
+            elif name == 'target':
+                column.append(target)
+            else:
+                column.append(attrs.get(name))
+        self.size += 1
+        return self.size >= self.chunk_size
+
+    def flush(self):
+        chunk = {'routers': self.routers, 'links': self.links}
+        self.routers = []
+        self._reset()
+        return chunk
+
+
+def iter_csv_chunks(source, chunk_size=10000):
+    """Stream an edge-list CSV with a header row (source,target,latency,...)"""
+    stream = _text_stream(source)
+    try:
+        reader = csv.reader(stream)
+        header = [name.strip().lower() for name in next(reader)]
+        try:
+            src = next(header.index(n) for n in SOURCE_NAMES if n in header)
+            dst = next(header.index(n) for n in TARGET_NAMES if n in header)
+        except StopIteration:
+            raise ValueError("CSV needs source and target columns") from None
+        columns = [(i, name) for i, name in enumerate(header) if name in LINK_COLUMNS]
+
+        chunker = _Chunker(chunk_size)
+        for row in reader:
+            if not row or len(row) <= max(src, dst):
+                continue
+            attrs = {name: _number(row[i]) for i, name in columns if i < len(row) and row[i] != ''}
+            if chunker.add_link(row[src].strip(), row[dst].strip(), attrs):
+                yield chunker.flush()
+        if chunker.size:
+            yield chunker.flush()
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def _haversine_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+class _ZooMapper:
+    """Turns Topology Zoo node/edge attributes into simulator routers and links"""
+
+    def __init__(self):
+        self.names = {}
+        self.used = set()
+        self.coords = {}
+
+    def node(self, node_id, data):
+        name = str(data.get('label') or node_id)
+        # Zoo files reuse labels; keep router IDs unique
+        if name in self.used:
+            name = f"{name}_{node_id}"
+        self.names[node_id] = name
+        self.used.add(name)
+        lat, lon = data.get('Latitude'), data.get('Longitude')
+        if lat is not None and lon is not None:
+            self.coords[node_id] = (float(lat), float(lon))
+        return name
+
+    def link(self, source, target, data):
+        attrs = {name: _number(data[name]) for name in LINK_COLUMNS if name in data}
+        speed = data.get('LinkSpeedRaw')
+        if 'bandwidth' not in attrs and speed not in (None, ''):
+            attrs['bandwidth'] = max(1, int(round(float(speed) / 1e6)))
+        if 'latency' not in attrs and source in self.coords and target in self.coords:
+            km = _haversine_km(self.coords[source], self.coords[target])
+            attrs['latency'] = max(1, int(round(km / FIBER_KM_PER_MS)))
+        return self.names.get(source, str(source)), self.names.get(target, str(target)), attrs
+
+
+def iter_graphml_chunks(source, chunk_size=10000):
+    """Stream a GraphML file (including Topology Zoo exports) with iterparse"""
+    stream = _binary_stream(source)
+    keys = {}
+    mapper = _ZooMapper()
+    chunker = _Chunker(chunk_size)
+    try:
+        for event, elem in ET.iterparse(stream, events=('end',)):
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if tag == 'key':
+                keys[elem.get('id')] = elem.get('attr.name') or elem.get('id')
+            elif tag == 'node':
+                data = {keys.get(d.get('key'), d.get('key')): d.text for d in elem if d.tag.endswith('data')}
+                chunker.routers.append(mapper.node(elem.get('id'), data))
+                elem.clear()
+            elif tag == 'edge':
+                data = {keys.get(d.get('key'), d.get('key')): d.text for d in elem if d.tag.endswith('data')}
+                if chunker.add_link(*mapper.link(elem.get('source'), elem.get('target'), data)):
+                    yield chunker.flush()
+                elem.clear()
+        if chunker.size or chunker.routers:
+            yield chunker.flush()
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+_GML_TOKEN = re.compile(r'"[^"]*"|\[|\]|[^\s\[\]]+')
+
+
+def iter_gml_chunks(source, chunk_size=10000):
+    """Stream a Topology Zoo GML file line by line"""
+    stream = _text_stream(source)
+    mapper = _ZooMapper()
+    chunker = _Chunker(chunk_size)
+    stack = []
+    pending_key = None
+    try:
+        for line in stream:
+            for token in _GML_TOKEN.findall(line):
+                if token == '[':
+                    stack.append((pending_key, {}))
+                    pending_key = None
+                elif token == ']':
+                    kind, data = stack.pop()
+                    if kind == 'node' and len(stack) == 1:
+                        chunker.routers.append(mapper.node(data.get('id'), data))
+                    elif kind == 'edge' and len(stack) == 1:
+                        if chunker.add_link(*mapper.link(data.get('source'), data.get('target'), data)):
+                            yield chunker.flush()
+                elif pending_key is None:
+                    pending_key = token
+                else:
+                    if stack:
+                        stack[-1][1][pending_key] = token.strip('"')
+                    pending_key = None
+        if chunker.size or chunker.routers:
+            yield chunker.flush()
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+READERS = {
+    'csv': iter_csv_chunks,
+    'graphml': iter_graphml_chunks,
+    'xml': iter_graphml_chunks,
+    'gml': iter_gml_chunks
+}
+
+
+def import_topology(simulator, source, fmt=None, chunk_size=10000, replace=True):
+    """Load a topology file through the simulator's bulk API in one transaction
+
+    Returns (routers, links) counts. fmt defaults to the file extension.
+    The file is streamed chunk by chunk; if it turns out to be malformed
+    part way, the simulator is rolled back to a snapshot taken before it
+    was cleared, so it is never left half-loaded.
+    """
+    if fmt is None:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+        fmt = os.path.splitext(str(name))[1].lstrip('.').lower()
+    if fmt not in READERS:
+        raise ValueError(f"Unsupported topology format: {fmt or 'unknown'}")
+
+    # Cheap: the graph is frozen and shared rather than copied
+    before = simulator.snapshot()
+    if replace:
+        simulator.reset_network()
+    routers_before = simulator.graph.number_of_nodes()
+    links_before = simulator.graph.number_of_edges()
+
+    try:
+        with simulator.batch():
+            for chunk in READERS[fmt](source, chunk_size):
+                links = chunk['links']
+                simulator.add_routers(chunk['routers'])
+                simulator.add_routers(links['source'])
+                simulator.add_routers(links['target'])
+                simulator.add_links(links['source'], links['target'],
+                                    latencies=_fill(links.get('latency'), 10),
+                                    bandwidths=_fill(links.get('bandwidth'), 100))
+                edges = list(zip(links['source'], links['target']))
+                for name in ('status', 'congestion', 'packet_loss'):
+                    if name in links:
+                        rows = [i for i, value in enumerate(links[name]) if value is not None]
+                        simulator.update_links([edges[i] for i in rows], **{name: [links[name][i] for i in rows]})
+    except Exception:
+        simulator.restore(before)
+        raise
+
+    return (simulator.graph.number_of_nodes() - routers_before,
+            simulator.graph.number_of_edges() - links_before)
+
+
+def _fill(values, default):
+    if values is None:
+        return default
+    return [default if value is None else value for value in values]
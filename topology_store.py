@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+
+class RouteCache:
+    """Bounded LRU of shortest-path trees keyed by source router"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source, compute, store=True):
+        with self._lock:
+            if source in self.trees:
+                self.trees.move_to_end(source)
+                return self.trees[source]
+        tree = compute(source)
+        if not store:
+            return tree
+        with self._lock:
+            self.trees[source] = tree
+            if len(self.trees) > self.maxsize:
+                self.trees.popitem(last=False)
+        return tree
+
+    def clear(self):
+        with self._lock:
+            self.trees.clear()
+
+
+class SharedTopology:
+    """A frozen topology plus the derived data every session can reuse"""
+
+    def __init__(self, name, graph, copy=True):
+        import networkx as nx
+        
+        # copy=False freezes graph in place, sharing it with its owner
+        self.name = name
+        self.graph = nx.freeze(graph.copy() if copy else graph)
+        self.route_cache = RouteCache(maxsize=1024)
+        self._layout = None
+        self._lock = threading.Lock()
+
+    def layout(self):
+        """Router positions, computed once for all sessions"""
+        with self._lock:
+            if self._layout is None:
+                import networkx as nx
+                self._layout = nx.spring_layout(self.graph, seed=42)
+            return self._layout
+
+
+class TopologyStore:
+    """Process-wide registry of read-only topologies shared across sessions"""
+
+    def __init__(self):
+        self.topologies = {}
+        self._lock = threading.Lock()
+
+    def publish(self, name, graph):
+        """Freeze a copy of graph and share it under name"""
+        shared = SharedTopology(name, graph)
+        with self._lock:
+            self.topologies[name] = shared
+        return shared
+
+    def get(self, name):
+        return self.topologies.get(name)
+
+    def names(self):
+        return sorted(self.topologies)
+
+    def remove(self, name):
+        with self._lock:
+            self.topologies.pop(name, None)
@@ -0,0 +1,135 @@
+import numpy as np
+
+from parallel_routing import sssp
+
+
+def uniform_demands(routers, total):
+    """Spread total Mbps evenly over every ordered pair of routers"""
+    routers = list(routers)
+    pairs = [(a, b) for a in routers for b in routers if a != b]
+    return {pair: total / len(pairs) for pair in pairs} if pairs else {}
+
+
+class EquilibriumResult:
+    """Link loads and congestion at (approximate) user equilibrium"""
+
+    def __init__(self, edges, load, bandwidth, cost, demands, demand_costs, gap, iterations):
+        self.edges = edges
+        self.load = load
+        self.congestion = 100 * load / bandwidth
+        self.cost = cost
+        self.demands = demands
+        self.demand_costs = demand_costs
+        self.gap = gap
+        self.iterations = iterations
+
+    @property
+    def unrouted(self):
+        """Demand (Mbps) between routers with no active path"""
+        volumes = np.array(list(self.demands.values()), dtype=float)
+        return float(volumes[~np.isfinite(self.demand_costs)].sum()) if len(volumes) else 0.0
+
+    def apply(self, simulator):
+        """Write the equilibrium congestion back onto the links (capped at 100%)"""
+        congestion = np.clip(np.round(self.congestion), 0, 100).astype(int)
+        simulator.update_links(self.edges, congestion=congestion)
+
+
+class TrafficEquilibrium:
+    """Frank–Wolfe traffic assignment over the simulator's active links
+
+    Link cost is the legacy routing weight latency * (1 + congestion/100)
+    with congestion = 100 * load / bandwidth, i.e. latency * (1 + load /
+    bandwidth). Each iteration routes every demand all-or-nothing on the
+    current costs, then moves towards that assignment by the step that
+    minimizes the Beckmann objective; for this linear cost the step has a
+    closed form. Loads are accumulated for all flows at once by walking
+    the predecessor arrays in lockstep.
+    """
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    def _compile(self):
+        graph = self.simulator.graph
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = [(u, v) for u, v, data in graph.edges(data=True) if data['status'] != 'failed']
+        latency = np.array([graph[u][v]['latency'] for u, v in edges], dtype=float)
+        bandwidth = np.array([graph[u][v]['bandwidth'] for u, v in edges], dtype=float)
+
+        m = len(edges)
+        ends = np.array([(index[u], index[v]) for u, v in edges], dtype=np.int64).reshape(m, 2)
+        arc_src = np.concatenate([ends[:, 0], ends[:, 1]])
+        arc_dst = np.concatenate([ends[:, 1], ends[:, 0]])
+        arc_link = np.concatenate([np.arange(m), np.arange(m)])
+
+        order = np.argsort(arc_src, kind='stable')
+        self.nodes, self.index, self.edges = nodes, index, edges
+        # No bandwidth: any load saturates the link, as LinkQueueModel drops all of it
+        self.latency, self.bandwidth = latency, np.maximum(bandwidth, 1e-9)
+        self.indptr = np.searchsorted(arc_src[order], np.arange(len(nodes) + 1)).tolist()
+        self.indices = arc_dst[order].tolist()
+        self.arc_link = arc_link[order]
+
+        # Sorted (tail * n + head) keys map a predecessor step back to its link
+        keys = arc_src * len(nodes) + arc_dst
+        key_order = np.argsort(keys, kind='stable')
+        self.arc_keys = keys[key_order]
+        self.key_links = arc_link[key_order]
+
+    def _all_or_nothing(self, costs, sources, rows, dests, volumes):
+        """Link loads with every demand on its current shortest path"""
+        n = len(self.nodes)
+        weights = costs[self.arc_link].tolist()
+        dist = np.empty((len(sources), n))
+        prev = np.empty((len(sources), n), dtype=np.int64)
+        for r, source in enumerate(sources):
+            d, _, p = sssp(self.indptr, self.indices, weights, source, n)
+            dist[r], prev[r] = d, p
+
+        flow_costs = dist[rows, dests]
+        routed = np.isfinite(flow_costs)
+        load = np.zeros(len(self.edges))
+        row, node, volume = rows[routed], dests[routed], volumes[routed]
+        while len(node):
+            parent = prev[row, node]
+            moving = parent >= 0
+            row, node, parent, volume = row[moving], node[moving], parent[moving], volume[moving]
+            links = self.key_links[np.searchsorted(self.arc_keys, parent * n + node)]
+            load += np.bincount(links, weights=volume, minlength=len(self.edges))
+            node = parent
+        return load, flow_costs
+
+    def solve(self, demands, max_iterations=50, tolerance=1e-4):
+        """Route a {(source, destination): Mbps} demand matrix to equilibrium"""
+        self._compile()
+        demands = {(a, b): v for (a, b), v in demands.items() if a != b and v > 0}
+        unknown = {r for pair in demands for r in pair} - set(self.index)
+        if unknown:
+            raise ValueError(f"Unknown routers in demands: {', '.join(map(str, sorted(unknown)))}")
+
+        pairs = list(demands)
+        src = np.array([self.index[a] for a, _ in pairs], dtype=np.int64)
+        dests = np.array([self.index[b] for _, b in pairs], dtype=np.int64)
+        volumes = np.array([demands[p] for p in pairs], dtype=float)
+        sources, rows = np.unique(src, return_inverse=True)
+        flows = (sources.tolist(), rows, dests, volumes)
+
+        latency, slope = self.latency, self.latency / self.bandwidth
+        load, flow_costs = self._all_or_nothing(latency, *flows)
+        gap, iterations = 0.0, 0
+        for iterations in range(1, max_iterations + 1):
+            costs = latency + slope * load
+            target, flow_costs = self._all_or_nothing(costs, *flows)
+            total = costs @ load
+            gap = (total - costs @ target) / total if total > 0 else 0.0
+            if gap < tolerance:
+                break
+            direction = target - load
+            curvature = slope @ (direction * direction)
+            step = 1.0 if curvature <= 0 else float(np.clip(-(costs @ direction) / curvature, 0.0, 1.0))
+            load = load + step * direction
+
+        return EquilibriumResult(self.edges, load, self.bandwidth, latency + slope * load,
+                                 demands, flow_costs, gap, iterations)
@@ -1,5 +1,15 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
+
+from status_tables import StatusTables
+from link_schedule import LinkSchedule
+from forwarding import ForwardingPlane
+from fast_reroute import FastReroute
+from traffic_equilibrium import TrafficEquilibrium, uniform_demands
+from topology_import import import_topology
+
+# Largest network whose fast-reroute tables are recomputed on every rerun
+FRR_AUTO_ROUTERS = 200
 
 class UIComponents:
 
@@ -18,6 +28,67 @@ class UIComponents:
                 simulator.generate_random_network(num_routers)
                 st.success(f"Generated random network with {num_routers} routers")
                 st.rerun()
+        
+        with st.expander("Import Topology"):
+            upload = st.file_uploader("Topology File", type=['csv', 'graphml', 'xml', 'gml'],
+                                      help="Edge-list CSV (source,target,latency,...), GraphML or Topology Zoo GML")
+            merge = st.checkbox("Merge into current network", key="import_merge")
+            if upload is not None and st.button("📥 Import"):
+                try:
+                    routers, links = import_topology(simulator, upload, replace=not merge)
+                except (ValueError, SyntaxError) as e:
+                    st.error(f"Import failed: {e}")
+                else:
+                    simulator.logs.append(f"Imported {upload.name}: {routers} routers, {links} links")
+                    st.rerun()
+    
+    @staticmethod
+    def render_shared_topologies(simulator, store):
+        """Render controls for process-wide shared topologies"""
+        with st.expander("Shared Topologies"):
+            name = st.text_input("Topology Name", key="shared_name")
+            if st.button("📤 Publish Current") and name and simulator.graph.nodes:
+                store.publish(name, simulator.graph)
+                st.success(f"Published topology {name}")
+            
+            names = store.names()
+            if names:
+                selected = st.selectbox("Open Shared", names, key="shared_open")
+                if st.button("📂 Open"):
+                    simulator.attach(store.get(selected))
+                    st.rerun()
+            
+            if simulator.shared is not None:
+                state = "private edits" if simulator.diverged else "read-only view"
+                st.caption(f"Viewing {simulator.shared.name} ({state})")
+    
+    @staticmethod
+    def render_snapshots(simulator):
+        """Render checkpoint, restore and seed controls"""
+        if 'snapshots' not in st.session_state:
+            st.session_state.snapshots = []
+        snapshots = st.session_state.snapshots
+        
+        with st.expander("Snapshots"):
+            # A fresh key after each restore, so the widget shows the restored seed instead of reseeding
+            seed_key = f"sim_seed_{st.session_state.get('snapshot_restores', 0)}"
+            seed = st.number_input("Random Seed", min_value=0, value=simulator.seed, key=seed_key)
+            if seed != simulator.seed:
+                simulator.reseed(seed)
+            
+            name = st.text_input("Snapshot Name", key="snapshot_name")
+            if st.button("📸 Take Snapshot"):
+                snapshots.append(simulator.snapshot(name or f"Snapshot {len(snapshots) + 1}"))
+                st.success(f"Saved {snapshots[-1].name}")
+            
+            if snapshots:
+                labels = [f"{s.name} ({s.created:%H:%M:%S})" for s in snapshots]
+                choice = st.selectbox("Saved Snapshots", range(len(snapshots)),
+                                      format_func=lambda i: labels[i], key="snapshot_choice")
+                if st.button("⏪ Restore"):
+                    simulator.restore(snapshots[choice])
+                    st.session_state.snapshot_restores = st.session_state.get('snapshot_restores', 0) + 1
+                    st.rerun()
     
     @staticmethod
     def render_router_management(simulator):
@@ -72,7 +143,9 @@ class UIComponents:
                             new_latency = st.number_input("Latency", value=edge_data['latency'])
                             packet_loss = st.slider("Packet Loss %", 0, 100, edge_data['packet_loss'])
                         with col_b:
-                            congestion = st.slider("Congestion %", 0, 100, edge_data['congestion'])
+                            # With the queueing model on, congestion follows the actual load
+                            congestion = st.slider("Congestion %", 0, 100, edge_data['congestion'],
+                                                   disabled=simulator.queue_model is not None)
                             status = st.selectbox("Status", ['active', 'failed'], 
                                                 index=0 if edge_data['status'] == 'active' else 1)
                         
@@ -84,6 +157,39 @@ class UIComponents:
                             st.success("Link updated")
                             st.rerun()
     
+    @staticmethod
+    def render_link_schedule(simulator):
+        """Render time-varying link condition controls"""
+        if not simulator.graph.edges:
+            return
+        
+        with st.expander("Link Schedule"):
+            edges = list(simulator.graph.edges)
+            selected_edge = st.selectbox("Scheduled Link", [f"{u} ↔ {v}" for u, v in edges], key="schedule_link")
+            event = st.selectbox("Event", ["Diurnal congestion", "Flapping", "Maintenance window"], key="schedule_event")
+            start_h, end_h = st.slider("Window (hours)", 0.0, 24.0, (8.0, 10.0), 0.25, key="schedule_window")
+            
+            if st.button("Add to Schedule"):
+                if simulator.schedule is None:
+                    simulator.set_schedule(LinkSchedule())
+                u, v = selected_edge.split(" ↔ ")
+                if event == "Diurnal congestion":
+                    simulator.schedule.add_diurnal_congestion(u, v)
+                elif event == "Flapping":
+                    simulator.schedule.add_flapping(u, v, start_h * 3600, end_h * 3600)
+                else:
+                    simulator.schedule.add_maintenance(u, v, start_h * 3600, end_h * 3600)
+                simulator.set_clock(simulator.clock)
+                st.success(f"{event} scheduled on {selected_edge}")
+                st.rerun()
+            
+            if simulator.schedule is not None:
+                # Only seek when the slider moves; animation ticks also advance the clock
+                st.slider("Simulated Clock (hours)", 0.0, 24.0,
+                          min(24.0, simulator.clock / 3600), 0.25, key="schedule_clock",
+                          on_change=lambda: simulator.set_clock(st.session_state.schedule_clock * 3600))
+                st.caption(f"{len(simulator.schedule)} scheduled events")
+    
     @staticmethod
     def render_simulation_controls(simulator):
         """Render simulation controls"""
@@ -91,8 +197,18 @@ class UIComponents:
         
         if len(simulator.graph.nodes) >= 2:
             routers = list(simulator.graph.nodes)
+            mode = st.radio("Send Mode", ["Unicast", "Multicast", "Broadcast"], horizontal=True, key="sim_mode")
             start_router = st.selectbox("Start Router", routers, key="sim_start")
-            end_router = st.selectbox("End Router", routers, key="sim_end")
+            if mode == "Unicast":
+                end_router = st.selectbox("End Router", routers, key="sim_end")
+                if not simulator.connectivity.connected(start_router, end_router):
+                    st.caption(f"⚠️ {end_router} is unreachable from {start_router}")
+            else:
+                if mode == "Multicast":
+                    receivers = st.multiselect("Receivers", [r for r in routers if r != start_router], key="sim_receivers")
+                else:
+                    receivers = None
+                steiner = st.checkbox("Steiner tree (fewer links, longer paths)", key="sim_steiner")
             
             col_packet1, col_packet2 = st.columns(2)
             with col_packet1:
@@ -100,10 +216,23 @@ class UIComponents:
             with col_packet2:
                 packet_size = st.number_input("Packet Size (KB)", min_value=1, max_value=1500, value=64)
             
+            queueing = st.checkbox("Queueing Model (FIFO, tail drop)", value=simulator.queue_model is not None)
+            simulator.set_queueing(queueing)
+            
+            areas = st.checkbox("Area Routing (OSPF-style)", value=simulator.areas is not None)
+            simulator.set_areas(areas)
+            if simulator.areas is not None:
+                rows = simulator.areas.summary()
+                st.caption(f"{len(rows)} areas, {sum(row['Border Routers'] for row in rows)} border routers")
+            
             col_sim1, col_sim2 = st.columns(2)
             with col_sim1:
                 if st.button("Send Packet"):
-                    if start_router != end_router:
+                    if mode != "Unicast":
+                        if receivers is None or receivers:
+                            simulator.simulate_multicast(start_router, receivers, steiner, packet_size)
+                            st.rerun()
+                    elif start_router != end_router:
                         simulator.simulate_packet(start_router, end_router, num_packets, packet_size)
                         st.rerun()
             
@@ -114,41 +243,156 @@ class UIComponents:
                     simulator.packet_stats['status'] = 'idle'
                     st.rerun()
     
+    @staticmethod
+    def render_paged_table(df, key, page_size=50):
+        """Render one page of a large table"""
+        pages = max(1, (len(df) + page_size - 1) // page_size)
+        page = 1
+        if pages > 1:
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=key)
+        start = (page - 1) * page_size
+        st.dataframe(df.iloc[start:start + page_size], use_container_width=True)
+    
+    @staticmethod
+    def render_forwarding(simulator):
+        """Render IP prefix assignment and longest-prefix-match lookups"""
+        if len(simulator.graph.nodes) < 2:
+            return
+        import pandas as pd
+        
+        with st.expander("Forwarding (IP Prefixes)"):
+            if st.button("Auto-assign /24 Prefixes"):
+                simulator.auto_assign_prefixes()
+                st.rerun()
+            
+            plane = st.session_state.get('forwarding')
+            if plane is None or plane.simulator is not simulator:
+                plane = st.session_state.forwarding = ForwardingPlane(simulator)
+            
+            routers = list(simulator.graph.nodes)
+            source = st.selectbox("From Router", routers, key="fib_source")
+            address = st.text_input("Destination Address", value="10.0.0.1", key="fib_address")
+            if st.button("Trace Address"):
+                try:
+                    path, delivered = plane.trace(source, address)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    outcome = "delivered" if delivered else "no route"
+                    st.write(f"{' -> '.join(path)} ({outcome})")
+            
+            fib = plane.fib(source)
+            if fib.size:
+                st.caption(f"FIB of {source}: {fib.size} prefixes")
+                UIComponents.render_paged_table(
+                    pd.DataFrame(list(fib.items()), columns=['Prefix', 'Next Hop']), key="fib_page")
+    
+    @staticmethod
+    def render_fast_reroute(simulator):
+        """Render LFA coverage, unprotected destinations and what-if repairs"""
+        if simulator.graph.number_of_edges() < 2:
+            return
+        import pandas as pd
+        
+        with st.expander("Fast Reroute (LFA)"):
+            frr = st.session_state.get('fast_reroute')
+            if frr is None or frr.simulator is not simulator:
+                frr = st.session_state.fast_reroute = FastReroute(simulator)
+            if frr.stale:
+                # Tens of seconds on thousands of routers: only on request past a small network
+                small = simulator.graph.number_of_nodes() <= FRR_AUTO_ROUTERS
+                if not small and not st.button("Compute Repairs", key="frr_compute"):
+                    st.info("Repair tables are out of date for this topology.")
+                    return
+                frr.compute()
+            
+            st.metric("Protected Destinations", f"{frr.coverage():.0%}")
+            unprotected = frr.unprotected()
+            if unprotected:
+                st.write("**Unprotected Destinations:**")
+                UIComponents.render_paged_table(
+                    pd.DataFrame(unprotected, columns=['Router', 'Destination', 'Primary Next Hop']),
+                    key="frr_page")
+            
+            links = [(u, v) for u, v, data in simulator.graph.edges(data=True) if data['status'] != 'failed']
+            if not links:
+                return
+            routers = list(simulator.graph.nodes)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                link = st.selectbox("Fail Link", links, format_func=lambda e: f"{e[0]} - {e[1]}", key="frr_link")
+            with col2:
+                source = st.selectbox("From", routers, key="frr_source")
+            with col3:
+                target = st.selectbox("To", routers, index=len(routers) - 1, key="frr_target")
+            if source != target:
+                path, kind = frr.repair_path(source, target, link)
+                if kind is None:
+                    st.warning(f"No repair: traffic stops at {path[-1]}")
+                else:
+                    st.write(f"{' -> '.join(path)} ({kind})")
+    
+    @staticmethod
+    def render_traffic_equilibrium(simulator):
+        """Render load-aware equilibrium routing of a uniform demand matrix"""
+        if simulator.graph.number_of_edges() < 1:
+            return
+        import pandas as pd
+        
+        with st.expander("Traffic Equilibrium"):
+            col1, col2 = st.columns(2)
+            with col1:
+                total = st.number_input("Total Demand (Mbps)", min_value=1, value=100, key="eq_demand")
+            with col2:
+                iterations = st.number_input("Max Iterations", min_value=1, max_value=500, value=50, key="eq_iters")
+            
+            if st.button("⚖️ Solve Equilibrium"):
+                demands = uniform_demands(simulator.graph.nodes, total)
+                st.session_state.equilibrium = TrafficEquilibrium(simulator).solve(demands, iterations)
+            
+            result = st.session_state.get('equilibrium')
+            if result is None:
+                return
+            st.caption(f"{result.iterations} iterations, relative gap {result.gap:.2e}, "
+                       f"unrouted {result.unrouted:.1f} Mbps")
+            UIComponents.render_paged_table(pd.DataFrame({
+                'Link': [f"{u} - {v}" for u, v in result.edges],
+                'Load (Mbps)': result.load.round(2),
+                'Congestion %': result.congestion.round(1),
+                'Cost (ms)': result.cost.round(2)
+            }), key="eq_page")
+            if st.button("Apply Congestion to Links"):
+                result.apply(simulator)
+                st.rerun()
+    
     @staticmethod
     def render_network_status(simulator):
         """Render network status tables"""
         if simulator.graph.nodes:
             st.subheader("Network Status")
             
-            # Nodes table
-            node_data = []
-            for node in simulator.graph.nodes:
-                node_data.append({
-                    'Router': node,
-                    'Status': simulator.graph.nodes[node]['status'],
-                    'Connections': len(list(simulator.graph.neighbors(node)))
-                })
+            if 'status_tables' not in st.session_state:
+                st.session_state.status_tables = StatusTables()
+            routers, links = st.session_state.status_tables.refresh(simulator)
             
-            if node_data:
-                st.write("**Routers:**")
-                st.dataframe(pd.DataFrame(node_data), use_container_width=True)
+            st.write("**Routers:**")
+            UIComponents.render_paged_table(routers, key="routers_page")
             
-            # Edges table
-            if simulator.graph.edges:
-                edge_data = []
-                for u, v in simulator.graph.edges:
-                    data = simulator.graph[u][v]
-                    edge_data.append({
-                        'Link': f"{u} ↔ {v}",
-                        'Latency': f"{data['latency']}ms",
-                        'Bandwidth': f"{data['bandwidth']}Mbps",
-                        'Congestion': f"{data['congestion']}%",
-                        'Packet Loss': f"{data['packet_loss']}%",
-                        'Status': data['status']
-                    })
+            components = simulator.connectivity.components()
+            if len(components) > 1:
+                import pandas as pd
                 
+                st.warning(f"Network is partitioned into {len(components)} components")
+                rows = []
+                for i, nodes in enumerate(components):
+                    names = sorted(map(str, nodes))
+                    members = ', '.join(names[:20]) + (', …' if len(names) > 20 else '')
+                    rows.append({'Component': i + 1, 'Routers': len(nodes), 'Members': members})
+                UIComponents.render_paged_table(pd.DataFrame(rows), key="components_page")
+            
+            if len(links):
                 st.write("**Links:**")
-                st.dataframe(pd.DataFrame(edge_data), use_container_width=True)
+                UIComponents.render_paged_table(links, key="links_page")
     
     @staticmethod
     def render_packet_stats(packet_stats):
@@ -168,6 +412,62 @@ class UIComponents:
             with col3:
                 st.write(f"**Hops:** {packet_stats.get('hops', 0)}")
                 st.write(f"**Total Latency:** {packet_stats.get('total_latency', 0):.2f}ms")
+            
+            if 'queueing_delay' in packet_stats:
+                col4, col5, col6 = st.columns(3)
+                with col4:
+                    st.write(f"**Propagation:** {packet_stats['propagation_delay']:.2f}ms")
+                with col5:
+                    st.write(f"**Queueing:** {packet_stats['queueing_delay']:.2f}ms")
+                    st.write(f"**Serialization:** {packet_stats['serialization_delay']:.2f}ms")
+                with col6:
+                    st.write(f"**Delivered:** {packet_stats['delivered']}")
+                    st.write(f"**Dropped:** {packet_stats['dropped']}")
+            
+            if 'receiver_costs' in packet_stats:
+                import pandas as pd
+                
+                col4, col5, col6 = st.columns(3)
+                with col4:
+                    st.write(f"**Mode:** {packet_stats['mode']}")
+                    st.write(f"**Unreachable:** {packet_stats['unreachable']}")
+                with col5:
+                    st.write(f"**Link Usage:** {packet_stats['link_usage']}")
+                    st.write(f"**As Unicast:** {packet_stats['unicast_link_usage']}")
+                with col6:
+                    st.write(f"**Branch Points:** {packet_stats['branch_points']}")
+                UIComponents.render_paged_table(
+                    pd.DataFrame(list(packet_stats['receiver_costs'].items()), columns=['Receiver', 'Cost (ms)']),
+                    key="receivers_page")
+    
+    @staticmethod
+    def render_flow_analytics(analytics):
+        """Render latency percentiles and distributions across every send"""
+        if not analytics.stats['flow']:
+            return
+        import pandas as pd
+        
+        st.subheader("Latency Analytics")
+        
+        dimension = st.radio("Group By", ["flow", "source", "destination", "link"],
+                             format_func=str.capitalize, horizontal=True, key="analytics_dim")
+        rows = analytics.summary(dimension)
+        labels = [" -> ".join(map(str, row['key'])) if dimension == 'flow' else
+                  " - ".join(map(str, row['key'])) if dimension == 'link' else str(row['key']) for row in rows]
+        df = pd.DataFrame(rows).drop(columns='key')
+        df.insert(0, dimension.capitalize(), labels)
+        df['loss'] = (100 * df['loss']).round(1)
+        UIComponents.render_paged_table(df.rename(columns={
+            'packets': 'Packets', 'mean': 'Mean (ms)', 'p50': 'p50 (ms)', 'p95': 'p95 (ms)',
+            'p99': 'p99 (ms)', 'max': 'Max (ms)', 'loss': 'Loss %'}).round(2), key="analytics_page")
+        
+        choice = st.selectbox("Distribution Of", range(len(rows)), format_func=lambda i: labels[i], key="analytics_key")
+        values, counts = analytics.stats[dimension][rows[choice]['key']].latency.histogram()
+        st.bar_chart(pd.DataFrame({'Packets': counts}, index=pd.Index(np.round(values, 2), name='Latency (ms)')))
+        
+        if st.button("Reset Analytics"):
+            analytics.clear()
+            st.rerun()
     
     @staticmethod
     def render_simulation_logs(logs):
@@ -177,6 +477,23 @@ class UIComponents:
             for i, log in enumerate(reversed(logs[-10:])):
                 st.text(f"{len(logs)-i}: {log}")
     
+    @staticmethod
+    def render_view_controls(simulator, visualizer):
+        """Render zoom controls and a nearest-router lookup for the plot"""
+        with st.expander("🔍 Zoom & Locate"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                x = st.number_input("X", -1.5, 1.5, 0.0, 0.05, key="view_x")
+            with col2:
+                y = st.number_input("Y", -1.5, 1.5, 0.0, 0.05, key="view_y")
+            with col3:
+                zoom = st.slider("Zoom", 1.0, 20.0, 1.0, 0.5, key="view_zoom")
+            
+            nearest = visualizer.router_at(simulator, x, y)
+            st.write(f"Nearest router to ({x:.2f}, {y:.2f}): **{nearest}**")
+            snap = st.checkbox("Center on nearest router", value=True, key="view_snap")
+            visualizer.set_zoom(simulator, zoom, nearest if snap else (x, y))
+    
     @staticmethod
     def render_legend():
         """Render network visualization legend"""
@@ -189,4 +506,5 @@ class UIComponents:
         - Red dashed edges: Failed links
         - 🔴 Red vector: Moving data packet
         - 🟠 Orange trail: Packet movement history
+        - Overlapping labels are hidden; zoom in to see more
         """)
\ No newline at end of file
@@ -1,19 +1,35 @@
 import subprocess
 import os
+import tempfile
 import streamlit as st
 
 class VideoGenerator:
     def __init__(self):
         self.output_path = None
     
-    def create_video_with_ffmpeg(self, frames, output_name='packet_simulation.mp4'):
+    def create_cached_video(self, frame_buffer, cache, fps=5):
+        """Video of the captured frames from the export cache, encoding only on a miss"""
+        if len(frame_buffer) < 2:
+            return None
+        
+        def render(path):
+            # Frames go to a private directory so concurrent exports never collide
+            frames = frame_buffer.write_pngs(tempfile.mkdtemp(prefix='frames-'))
+            try:
+                return self.create_video_with_ffmpeg(frames, path, fps)
+            finally:
+                self.cleanup_frames(frames)
+        
+        return cache.get_or_create(cache.key('mp4', frame_buffer.digest(), fps), '.mp4', render)
+    
+    def create_video_with_ffmpeg(self, frames, output_name='packet_simulation.mp4', fps=5):
         """Create video using FFmpeg"""
         if len(frames) < 2:
             return None
         
         # Check if ffmpeg is available
         try:
-            result = subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True, shell=True)
+            result = subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
         except (subprocess.CalledProcessError, FileNotFoundError):
             st.error("FFmpeg not found. Please install FFmpeg to generate videos.")
             return None
@@ -21,13 +37,13 @@ class VideoGenerator:
         try:
             self.output_path = output_name
             cmd = [
-                'ffmpeg', '-y', '-framerate', '5',
-                '-i', 'frames/frame_%04d.png',
+                'ffmpeg', '-y', '-framerate', str(fps),
+                '-i', os.path.join(os.path.dirname(frames[0]), 'frame_%04d.png'),
                 '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
                 '-vf', 'scale=800:600',
                 self.output_path
             ]
-            subprocess.run(cmd, check=True, capture_output=True, shell=True)
+            subprocess.run(cmd, check=True, capture_output=True)
             return self.output_path
         except Exception as e:
             st.error(f"Video generation failed: {e}")
@@ -40,7 +56,7 @@ class VideoGenerator:
         
         # Check if ffmpeg is available
         try:
-            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True, shell=True)
+            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
         except (subprocess.CalledProcessError, FileNotFoundError):
             st.error("FFmpeg not found. Please install FFmpeg to generate videos.")
             return None
@@ -53,7 +69,7 @@ class VideoGenerator:
                 '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
                 output_path
             ]
-            subprocess.run(cmd, check=True, capture_output=True, shell=True)
+            subprocess.run(cmd, check=True, capture_output=True)
             
             # Cleanup frames
             for frame in frames:
@@ -67,11 +83,13 @@ class VideoGenerator:
     
     def cleanup_frames(self, frames):
         """Clean up animation frames"""
+        directories = {os.path.dirname(frame) or '.' for frame in frames} | {'frames'}
         for frame in frames:
             if os.path.exists(frame):
                 os.remove(frame)
-        if os.path.exists('frames') and not os.listdir('frames'):
-            os.rmdir('frames')
+        for directory in directories:
+            if directory != '.' and os.path.isdir(directory) and not os.listdir(directory):
+                os.rmdir(directory)
     
     def cleanup_videos(self):
         """Clean up generated videos"""
@@ -1,19 +1,111 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import networkx as nx
+from contextlib import contextmanager
+import math
 import numpy as np
 import os
 import warnings
 
+from frame_buffer import FrameBuffer
+from spatial_index import SpatialIndex
+
 # Suppress font warnings
 warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
 
+# Packet body and header, in data units relative to the packet position
+PACKET_GLYPH = [
+    [(-0.03, -0.02), (0.03, -0.02), (0.03, 0.02), (-0.03, 0.02)],
+    [(-0.025, 0.01), (0.025, 0.01), (0.025, 0.025), (-0.025, 0.025)]
+]
+TRAIL_LAGS = np.arange(5) * 0.1
+
+# Room each label needs on screen, in pixels; closer labels are culled
+ROUTER_LABEL_PX = 36
+EDGE_LABEL_PX = 48
+# Padding around the layout when zooming, in layout units
+VIEW_MARGIN = 0.15
+
+@contextmanager
+def temporary_figure(figsize=(8, 6)):
+    """Yield a figure outside pyplot's registry and always release it"""
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    try:
+        yield fig, ax
+    finally:
+        fig.clear()
+
+
 class NetworkVisualizer:
-    def __init__(self):
-        self.animation_frames = []
+    def __init__(self, lod_threshold=200, frame_capacity=300):
+        # Frame capture is opt-in; frames stay in memory until exported
+        self.capture_frames = False
+        self.frame_buffer = FrameBuffer(capacity=frame_capacity)
+        # Above this many routers, glyphs collapse to plain markers
+        self.lod_threshold = lod_threshold
+        self.fig = None
+        self.ax = None
+        self._packet_layer = None
+        # What the static layers on the axes were drawn from; see draw_network
+        self._scene = None
+        # Visible (xmin, ymin, xmax, ymax) in layout units; None shows everything
+        self.viewport = None
+        self._spatial = None
+    
+    def get_figure(self, figsize=(10, 8)):
+        """Return the persistent figure; draw_network clears it only when the network changed"""
+        # Built without pyplot so reruns never register new figures globally
+        if self.fig is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.fig = Figure(figsize=figsize)
+            FigureCanvasAgg(self.fig)
+            self.ax = self.fig.subplots()
+        return self.fig, self.ax
+    
+    def spatial_index(self, simulator, pos=None):
+        """(routers, router index, links, link-midpoint index), rebuilt when the layout changes"""
+        pos = simulator.layout() if pos is None else pos
+        cached = self._spatial
+        if cached is None or cached[0] is not pos or cached[1] != simulator.structure_version:
+            nodes = list(simulator.graph.nodes)
+            edges = list(simulator.graph.edges)
+            xy = np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+            row = {node: i for i, node in enumerate(nodes)}
+            ends = np.array([(row[u], row[v]) for u, v in edges], dtype=np.int64).reshape(-1, 2)
+            midpoints = (xy[ends[:, 0]] + xy[ends[:, 1]]) / 2
+            cached = self._spatial = (pos, simulator.structure_version, nodes, SpatialIndex(xy),
+                                      edges, SpatialIndex(midpoints))
+        return cached[2:]
+    
+    def router_at(self, simulator, x, y, radius=None):
+        """Router nearest to (x, y) in layout units, or None if none is within radius"""
+        nodes, routers, _, _ = self.spatial_index(simulator)
+        index = routers.nearest(x, y, math.inf if radius is None else radius)
+        return None if index is None else nodes[index]
+    
+    def set_zoom(self, simulator, zoom=1.0, center=None):
+        """Show 1/zoom of the layout around center, a router or an (x, y) point"""
+        if zoom <= 1 or not simulator.graph.nodes:
+            self.viewport = None
+            return None
+        pos = simulator.layout()
+        _, routers, _, _ = self.spatial_index(simulator, pos)
+        lo, hi = routers.lo - VIEW_MARGIN, routers.hi + VIEW_MARGIN
+        if center is None:
+            cx, cy = (lo + hi) / 2
+        elif center in pos:
+            cx, cy = pos[center]
+        else:
+            cx, cy = center
+        half_w, half_h = (hi - lo) / (2 * zoom)
+        self.viewport = (cx - half_w, cy - half_h, cx + half_w, cy + half_h)
+        return self.viewport
     
     def create_packet_vector(self, ax, x, y):
         """Create a vector packet representation"""
+        import matplotlib.patches as patches
+        
         packet_body = patches.Rectangle((x-0.03, y-0.02), 0.06, 0.04, 
                                       facecolor='red', edgecolor='darkred', linewidth=2)
         ax.add_patch(packet_body)
@@ -28,81 +120,158 @@ class NetworkVisualizer:
         
         return [packet_body, packet_header]
     
+    def draw_routers(self, simulator, ax, pos, nodes=None):
+        """Draw router glyphs (all, or just nodes) as a few batched collections"""
+        import matplotlib.patches as patches
+        from matplotlib.collections import PatchCollection, LineCollection
+        
+        nodes = list(simulator.graph.nodes) if nodes is None else list(nodes)
+        if not nodes:
+            return
+        
+        xy = np.array([pos[node] for node in nodes], dtype=float)
+        x, y = xy[:, 0], xy[:, 1]
+        on_path = set(simulator.packet_path)
+        if simulator.multicast is not None:
+            on_path.update(simulator.multicast.nodes)
+        colors = ['lightgreen' if node in on_path else 'lightblue' for node in nodes]
+        
+        # Level of detail: plain markers when many routers are in view
+        if len(nodes) > self.lod_threshold:
+            ax.scatter(x, y, c=colors, marker='s', s=30, edgecolors='black', linewidths=0.5, zorder=2)
+            return
+        
+        # Router bodies (rectangles)
+        bodies = [patches.Rectangle((bx-0.08, by-0.05), 0.16, 0.1) for bx, by in xy]
+        ax.add_collection(PatchCollection(bodies, facecolors=colors, edgecolors='black', linewidths=2))
+        
+        # Antenna lines
+        wide = np.stack([np.column_stack([x-0.04, y+0.06]), np.column_stack([x+0.04, y+0.06])], axis=1)
+        narrow = np.stack([np.column_stack([x-0.02, y+0.08]), np.column_stack([x+0.02, y+0.08])], axis=1)
+        ax.add_collection(LineCollection(np.concatenate([wide, narrow]), colors='black',
+                                         linewidths=[2] * len(nodes) + [1] * len(nodes)))
+        
+        # LED indicators
+        led_x = (x[:, None] + np.array([-0.05, 0, 0.05])).ravel()
+        led_y = np.repeat(y, 3)
+        ax.scatter(led_x, led_y, c=['red', 'green', 'blue'] * len(nodes), s=20)
+        
+        ax.autoscale_view()
+    
+    def draw_packets(self, simulator, ax, pos):
+        """Draw all in-flight packets: one body collection and one trail scatter
+        
+        The artists are kept and only their offsets and colors change, so a
+        loop that redraws packets without clearing the axes reuses them.
+        """
+        from matplotlib.collections import PolyCollection
+        from matplotlib.colors import to_rgba
+        from matplotlib.transforms import AffineDeltaTransform
+        
+        xy, valid = simulator.packets.interpolate(pos, lags=TRAIL_LAGS)
+        bodies = xy[:, 0][valid[:, 0]]
+        trail = xy[:, 1:][valid[:, 1:]]
+        alphas = np.broadcast_to(0.7 - TRAIL_LAGS[1:], valid[:, 1:].shape)[valid[:, 1:]]
+        
+        layer = self._packet_layer
+        if layer is None or layer[0] is not ax or layer[1] not in ax.collections:
+            body_collection = PolyCollection(PACKET_GLYPH, offsets=np.empty((0, 2)),
+                                             offset_transform=ax.transData,
+                                             transform=AffineDeltaTransform(ax.transData),
+                                             facecolors=['red', 'darkred'], edgecolors=['darkred', 'black'],
+                                             linewidths=[2, 1], zorder=5)
+            ax.add_collection(body_collection, autolim=False)
+            trail_collection = ax.scatter([], [], s=20, zorder=4)
+            layer = self._packet_layer = (ax, body_collection, trail_collection)
+        
+        _, body_collection, trail_collection = layer
+        # Each packet is drawn twice, once per glyph part
+        body_collection.set_offsets(np.repeat(bodies, 2, axis=0))
+        body_collection.set_visible(len(bodies) > 0)
+        
+        colors = np.tile(to_rgba('orange'), (len(trail), 1))
+        colors[:, 3] = alphas
+        trail_collection.set_offsets(trail)
+        trail_collection.set_facecolor(colors)
+        trail_collection.set_edgecolor('none')
+        return layer
+    
     def draw_network(self, simulator, fig, ax):
-        """Draw the complete network visualization"""
-        pos = nx.spring_layout(simulator.graph, seed=42)
+        """Draw the complete network visualization
         
-        # Draw router vectors
-        for node in simulator.graph.nodes:
-            x, y = pos[node]
-            color = 'lightgreen' if node in simulator.packet_path else 'lightblue'
-            
-            # Router body (rectangle)
-            router_body = patches.Rectangle((x-0.08, y-0.05), 0.16, 0.1, 
-                                          facecolor=color, edgecolor='black', linewidth=2)
-            ax.add_patch(router_body)
-            
-            # Antenna lines
-            ax.plot([x-0.04, x+0.04], [y+0.06, y+0.06], 'k-', linewidth=2)
-            ax.plot([x-0.02, x+0.02], [y+0.08, y+0.08], 'k-', linewidth=1)
-            
-            # LED indicators
-            ax.scatter([x-0.05, x, x+0.05], [y, y, y], c=['red', 'green', 'blue'], s=20)
-        
-        # Draw animated packet
-        if simulator.animating and simulator.packet_path and len(simulator.packet_path) > 1:
-            path_idx = int(simulator.packet_position)
-            if path_idx < len(simulator.packet_path) - 1:
-                start_node = simulator.packet_path[path_idx]
-                end_node = simulator.packet_path[path_idx + 1]
-                
-                start_pos = pos[start_node]
-                end_pos = pos[end_node]
-                
-                t = simulator.packet_position - path_idx
-                packet_x = start_pos[0] + t * (end_pos[0] - start_pos[0])
-                packet_y = start_pos[1] + t * (end_pos[1] - start_pos[1])
-                
-                self.create_packet_vector(ax, packet_x, packet_y)
-                
-                # Add packet trail
-                trail_length = min(5, len(simulator.packet_path))
-                for i in range(1, trail_length):
-                    if simulator.packet_position - i * 0.1 >= 0:
-                        trail_idx = int(simulator.packet_position - i * 0.1)
-                        if trail_idx < len(simulator.packet_path) - 1:
-                            trail_t = (simulator.packet_position - i * 0.1) - trail_idx
-                            trail_x = pos[simulator.packet_path[trail_idx]][0] + trail_t * (pos[simulator.packet_path[trail_idx + 1]][0] - pos[simulator.packet_path[trail_idx]][0])
-                            trail_y = pos[simulator.packet_path[trail_idx]][1] + trail_t * (pos[simulator.packet_path[trail_idx + 1]][1] - pos[simulator.packet_path[trail_idx]][1])
-                            ax.scatter(trail_x, trail_y, c='orange', s=20, alpha=0.7 - i*0.1, zorder=4)
-            
-            if simulator.animating:
+        Only routers inside the viewport get glyphs, and labels are thinned
+        through the spatial index so none overlap at the current zoom.
+        While only packets move (same topology, path and view), the axes are
+        kept and just the packet layer's offsets are updated.
+        """
+        import networkx as nx
+        
+        pos = simulator.layout()
+        scene = (ax, pos, simulator.multicast, (simulator.version, self.viewport, tuple(simulator.packet_path)))
+        last, layer = self._scene, self._packet_layer
+        if last is not None and all(a is b for a, b in zip(last[:3], scene[:3])) and last[3] == scene[3] \
+                and layer is not None and layer[1] in ax.collections:
+            self.draw_packets(simulator, ax, pos)
+            if simulator.animating and self.capture_frames:
                 self.save_animation_frame(fig)
+            return pos
+        ax.clear()
+        self._scene = scene
+        
+        nodes, routers, edges, midpoints = self.spatial_index(simulator, pos)
+        visible = routers.within(*self.viewport) if self.viewport is not None else np.arange(len(nodes))
+        
+        # Draw router vectors
+        self.draw_routers(simulator, ax, pos, [nodes[i] for i in visible])
+        
+        # Draw every in-flight packet
+        self.draw_packets(simulator, ax, pos)
         
         # Draw edges
         edge_colors = []
         edge_styles = []
-        for u, v in simulator.graph.edges:
+        edge_priority = np.zeros(len(edges))
+        for i, (u, v) in enumerate(edges):
             edge_data = simulator.graph[u][v]
             if edge_data['status'] == 'failed':
                 edge_colors.append('red')
                 edge_styles.append('--')
+                edge_priority[i] = 2
             elif edge_data['congestion'] > 50:
                 edge_colors.append('orange')
                 edge_styles.append('-')
+                edge_priority[i] = 1
             else:
                 edge_colors.append('gray')
                 edge_styles.append('-')
         
-        nx.draw_networkx_edges(simulator.graph, pos, edge_color=edge_colors, 
+        nx.draw_networkx_edges(simulator.graph, pos, edgelist=edges, edge_color=edge_colors, 
                              style=edge_styles, ax=ax)
         
-        # Draw labels
-        nx.draw_networkx_labels(simulator.graph, pos, ax=ax, font_size=10, font_weight='bold')
+        if self.viewport is not None:
+            xmin, ymin, xmax, ymax = self.viewport
+            ax.set_xlim(xmin, xmax)
+            ax.set_ylim(ymin, ymax)
+        
+        # Label footprints in data units shrink as the view zooms in
+        bbox = ax.get_position()
+        (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+        per_pixel = max(abs(x1 - x0) / (bbox.width * fig.get_figwidth() * fig.dpi),
+                        abs(y1 - y0) / (bbox.height * fig.get_figheight() * fig.dpi))
+        view = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
         
-        # Draw edge labels
+        # Draw labels, path routers and hubs first
+        on_path = set(simulator.packet_path)
+        router_priority = np.array([2 * (node in on_path) + simulator.graph.degree(node) / (len(nodes) + 1)
+                                    for node in nodes])
+        shown = routers.thin(ROUTER_LABEL_PX * per_pixel, routers.within(*view), router_priority)
+        nx.draw_networkx_labels(simulator.graph, pos, labels={nodes[i]: nodes[i] for i in shown},
+                                ax=ax, font_size=10, font_weight='bold')
+        
+        # Draw edge labels, failed and congested links first
         edge_labels = {}
-        for u, v in simulator.graph.edges:
+        for i in midpoints.thin(EDGE_LABEL_PX * per_pixel, midpoints.within(*view), edge_priority):
+            u, v = edges[i]
             edge_data = simulator.graph[u][v]
             label = f"{edge_data['latency']}ms"
             if edge_data['congestion'] > 0:
@@ -115,66 +284,69 @@ class NetworkVisualizer:
         ax.set_title("Network Topology")
         ax.axis('off')
         
+        if simulator.animating and self.capture_frames:
+            self.save_animation_frame(fig)
+        
         return pos
     
     def save_animation_frame(self, fig):
-        """Save current frame for FFmpeg animation"""
-        if not os.path.exists('frames'):
-            os.makedirs('frames')
-        
-        frame_path = f'frames/frame_{len(self.animation_frames):04d}.png'
-        fig.savefig(frame_path, dpi=100, bbox_inches='tight')
-        self.animation_frames.append(frame_path)
+        """Capture current frame into the in-memory ring buffer"""
+        self.frame_buffer.capture(fig)
+    
+    def export_animation_frames(self, directory='frames'):
+        """Encode captured frames to PNG files for FFmpeg animation"""
+        return self.frame_buffer.write_pngs(directory, prefix='frame')
     
     def generate_manual_frames(self, simulator):
         """Generate frames for manual video creation"""
+        import matplotlib.patches as patches
+        import networkx as nx
+        
         if not simulator.packet_path:
             return []
         
         if not os.path.exists('frames'):
             os.makedirs('frames')
         
-        pos = nx.spring_layout(simulator.graph, seed=42)
+        pos = simulator.layout()
         frames = []
         
         for frame_num in range(20):
-            fig_temp, ax_temp = plt.subplots(figsize=(8, 6))
-            
-            # Draw router vectors
-            for node in simulator.graph.nodes:
-                x, y = pos[node]
-                color = 'lightgreen' if node in simulator.packet_path else 'lightblue'
+            with temporary_figure(figsize=(8, 6)) as (fig_temp, ax_temp):
+                # Draw router vectors
+                for node in simulator.graph.nodes:
+                    x, y = pos[node]
+                    color = 'lightgreen' if node in simulator.packet_path else 'lightblue'
+                    
+                    # Router body
+                    router_body = patches.Rectangle((x-0.06, y-0.04), 0.12, 0.08, 
+                                                  facecolor=color, edgecolor='black', linewidth=1)
+                    ax_temp.add_patch(router_body)
+                    
+                    # Antenna
+                    ax_temp.plot([x-0.03, x+0.03], [y+0.05, y+0.05], 'k-', linewidth=1)
+                    
+                    # LED
+                    ax_temp.scatter(x, y, c='green', s=15)
                 
-                # Router body
-                router_body = patches.Rectangle((x-0.06, y-0.04), 0.12, 0.08, 
-                                              facecolor=color, edgecolor='black', linewidth=1)
-                ax_temp.add_patch(router_body)
+                # Draw packet at different positions
+                if len(simulator.packet_path) > 1:
+                    progress = frame_num / 19.0 * (len(simulator.packet_path) - 1)
+                    path_idx = int(progress)
+                    if path_idx < len(simulator.packet_path) - 1:
+                        t = progress - path_idx
+                        start_pos = pos[simulator.packet_path[path_idx]]
+                        end_pos = pos[simulator.packet_path[path_idx + 1]]
+                        packet_x = start_pos[0] + t * (end_pos[0] - start_pos[0])
+                        packet_y = start_pos[1] + t * (end_pos[1] - start_pos[1])
+                        self.create_packet_vector(ax_temp, packet_x, packet_y)
                 
-                # Antenna
-                ax_temp.plot([x-0.03, x+0.03], [y+0.05, y+0.05], 'k-', linewidth=1)
+                nx.draw_networkx_edges(simulator.graph, pos, ax=ax_temp, edge_color='gray')
+                ax_temp.set_title(f"Packet Simulation - Frame {frame_num+1}")
+                ax_temp.axis('off')
                 
-                # LED
-                ax_temp.scatter(x, y, c='green', s=15)
-            
-            # Draw packet at different positions
-            if len(simulator.packet_path) > 1:
-                progress = frame_num / 19.0 * (len(simulator.packet_path) - 1)
-                path_idx = int(progress)
-                if path_idx < len(simulator.packet_path) - 1:
-                    t = progress - path_idx
-                    start_pos = pos[simulator.packet_path[path_idx]]
-                    end_pos = pos[simulator.packet_path[path_idx + 1]]
-                    packet_x = start_pos[0] + t * (end_pos[0] - start_pos[0])
-                    packet_y = start_pos[1] + t * (end_pos[1] - start_pos[1])
-                    self.create_packet_vector(ax_temp, packet_x, packet_y)
-            
-            nx.draw_networkx_edges(simulator.graph, pos, ax=ax_temp, edge_color='gray')
-            ax_temp.set_title(f"Packet Simulation - Frame {frame_num+1}")
-            ax_temp.axis('off')
-            
-            frame_path = f'frames/manual_{frame_num:04d}.png'
-            fig_temp.savefig(frame_path, dpi=100, bbox_inches='tight')
-            frames.append(frame_path)
-            plt.close(fig_temp)
+                frame_path = f'frames/manual_{frame_num:04d}.png'
+                fig_temp.savefig(frame_path, dpi=100, bbox_inches='tight')
+                frames.append(frame_path)
         
         return frames
\ No newline at end of file